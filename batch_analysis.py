@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, TypedDict, TYPE_CHECKING
+import json
+import time
+from utils.logger import logger
+from utils.resilience import ServiceGuard
+from utils.market import MarketSnapshot
+from config import config
+
+if TYPE_CHECKING:
+    import anthropic
+
+class PairData(TypedDict):
+    base: MarketSnapshot
+    quote: MarketSnapshot
+    correlation: Optional[float]
+
+class BatchAnalyzer:
+    """Analyze many pairs in one Claude request and split the answer per pair"""
+
+    def __init__(self,
+                 client: 'anthropic.Client',
+                 max_pairs_per_request: int = 10,
+                 tokens_per_pair: int = 120,
+                 max_chars: int = 180,
+                 guard: Optional[ServiceGuard] = None) -> None:
+        self.client = client
+        # Shares the interactive analysis' rate limit and circuit breaker when given
+        self.guard: Optional[ServiceGuard] = guard
+        self.config = config
+        self.max_pairs_per_request: int = max_pairs_per_request
+        self.tokens_per_pair: int = tokens_per_pair
+        self.max_chars: int = max_chars
+
+    @staticmethod
+    def _describe_coin(coin: MarketSnapshot) -> str:
+        # A missing field is reported as such rather than as a flat 0
+        change = 'n/a' if coin.change_24h is None else f"{coin.change_24h:+.2f}%"
+        volume = 'n/a' if coin.volume is None else f"${coin.volume:,.0f}"
+        return f"- {coin.symbol}: ${coin.price:,.4f} (24h {change}), volume {volume}"
+
+    def build_prompt(self, pairs: Dict[str, PairData]) -> str:
+        """One structured prompt covering every pair, asking for a JSON answer"""
+        sections = []
+        for pair_id, pair in pairs.items():
+            lines = [f"[{pair_id}]", self._describe_coin(pair['base']), self._describe_coin(pair['quote'])]
+            if pair['correlation'] is not None:
+                lines.append(f"- Return correlation: {pair['correlation']:.2f}")
+            sections.append("\n".join(lines))
+
+        return (
+            "Analyze each of the following crypto pairs: price relationship, sentiment "
+            "and short-term outlook.\n"
+            "Respond with only a JSON object mapping each pair id exactly as written "
+            f"in brackets to its analysis (at most {self.max_chars} characters each).\n\n"
+            + "\n\n".join(sections)
+        )
+
+    def build_request(self, pairs: Dict[str, PairData]) -> Dict[str, Any]:
+        """messages.create parameters for one chunk of pairs"""
+        return {
+            'model': self.config.CLAUDE_MODEL,
+            'max_tokens': min(self.tokens_per_pair * len(pairs) + 50, 4096),
+            'messages': [{"role": "user", "content": self.build_prompt(pairs)}]
+        }
+
+    def parse_response(self, text: str, pair_ids: List[str]) -> Dict[str, str]:
+        """Extract per-pair analyses from Claude's JSON answer; missing pairs are omitted"""
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            logger.log_error("Batch Analysis", "No JSON object in batched response")
+            return {}
+        try:
+            parsed = json.loads(text[start:end + 1])
+        except ValueError as e:
+            logger.log_error("Batch Analysis", f"Unparseable batched response: {str(e)}")
+            return {}
+
+        return {
+            pair_id: str(parsed[pair_id]).strip()
+            for pair_id in pair_ids
+            if isinstance(parsed, dict) and parsed.get(pair_id)
+        }
+
+    def chunk(self, pairs: Dict[str, PairData]) -> List[Dict[str, PairData]]:
+        """Split pairs into request-sized chunks"""
+        items = list(pairs.items())
+        return [
+            dict(items[i:i + self.max_pairs_per_request])
+            for i in range(0, len(items), self.max_pairs_per_request)
+        ]
+
+    def analyze(self, pairs: Dict[str, PairData]) -> Dict[str, str]:
+        """Analyze all pairs with one messages.create call per chunk"""
+        results: Dict[str, str] = {}
+        for chunk in self.chunk(pairs):
+            try:
+                request = self.build_request(chunk)
+                if self.guard is not None:
+                    response = self.guard.call(lambda attempt: self.client.messages.create(**request))
+                else:
+                    response = self.client.messages.create(**request)
+                parsed = self.parse_response(response.content[0].text, list(chunk))
+                logger.claude_logger.info(f"Batched analysis: {len(parsed)}/{len(chunk)} pairs parsed")
+                results.update(parsed)
+            except Exception as e:
+                logger.log_error("Batch Analysis", str(e))
+        return results
+
+class BulkAnalysisQueue:
+    """Offline backfill queue submitted through the Message Batches API"""
+
+    def __init__(self, analyzer: BatchAnalyzer, poll_interval: float = 30) -> None:
+        self.analyzer = analyzer
+        self.poll_interval: float = poll_interval
+        self._pending: Dict[str, Dict[str, PairData]] = {}
+        self._submitted: Dict[str, Dict[str, PairData]] = {}
+        self._next_id = 0
+
+    def add(self, pairs: Dict[str, PairData], prefix: str = 'chunk') -> None:
+        """Queue pairs for the next submission; custom ids are prefix-<n>"""
+        for chunk in self.analyzer.chunk(pairs):
+            self._pending[f"{prefix}-{self._next_id}"] = chunk
+            self._next_id += 1
+
+    def submit(self) -> Optional[str]:
+        """Send every queued chunk as one batch and return its id"""
+        if not self._pending:
+            return None
+        batch_requests = [
+            {'custom_id': custom_id, 'params': self.analyzer.build_request(chunk)}
+            for custom_id, chunk in self._pending.items()
+        ]
+        try:
+            batch = self.analyzer.client.messages.batches.create(requests=batch_requests)
+            logger.claude_logger.info(f"Submitted analysis batch {batch.id} with {len(batch_requests)} requests")
+            self._submitted.update(self._pending)
+            self._pending.clear()
+            return batch.id
+        except Exception as e:
+            logger.log_error("Bulk Analysis", f"Batch submission failed: {str(e)}")
+            return None
+
+    def collect(self, batch_id: str, timeout: float = 24 * 3600) -> Dict[str, str]:
+        """Wait for a submitted batch to finish and return per-pair analyses"""
+        batches = self.analyzer.client.messages.batches
+        deadline = time.monotonic() + timeout
+
+        while batches.retrieve(batch_id).processing_status != 'ended':
+            if time.monotonic() >= deadline:
+                logger.log_error("Bulk Analysis", f"Batch {batch_id} did not finish in {timeout}s")
+                return {}
+            time.sleep(self.poll_interval)
+
+        results: Dict[str, str] = {}
+        for item in batches.results(batch_id):
+            chunk = self._submitted.get(item.custom_id, {})
+            if item.result.type != 'succeeded':
+                logger.log_error("Bulk Analysis", f"{item.custom_id}: {item.result.type}")
+                continue
+            results.update(self.analyzer.parse_response(item.result.message.content[0].text, list(chunk)))
+        return results
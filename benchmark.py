@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Offline benchmark: drives full bot cycles against local CoinGecko, Claude and Twitter stand-ins
+
+    python benchmark.py --cycles 20 --assets 250
+    python benchmark.py --cycles 20 --skip-browser --compare bench_results/previous.json
+    python benchmark.py --startup --compare bench_results/previous-startup.json
+"""
+
+from typing import Dict, List, Optional, Any, Callable, Tuple
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import psutil
+
+from utils.stubs import StubBehavior, StubEnvironment
+
+STAGES = ('setup', 'fetch', 'correlation', 'analysis', 'post', 'cycle')
+
+# Singletons timed by --startup, in construction order; each resolves the ones it depends on first
+SINGLETONS = (
+    ('logger', 'utils.logger'),
+    ('config', 'config'),
+    ('tracer', 'utils.tracing'),
+    ('market_store', 'utils.storage'),
+    ('coingecko_client', 'utils.coingecko'),
+    ('browser_pool', 'utils.browser')
+)
+
+SINGLETON_PROBE = """
+import importlib, json, sys, time
+import bot
+from utils.lazy import is_built
+timings = {}
+for name, module in %r:
+    proxy = getattr(importlib.import_module(module), name)
+    prebuilt = is_built(proxy)
+    start = time.perf_counter()
+    proxy._lazy_resolve()
+    timings[name] = None if prebuilt else (time.perf_counter() - start) * 1000
+heavy = ('anthropic', 'aiohttp', 'webdriver_manager', 'selenium.webdriver.support.ui')
+print(json.dumps({'timings': timings, 'heavy_loaded': [m for m in heavy if m in sys.modules]}))
+"""
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """count, mean and nearest-rank p50/p95/p99/max, in milliseconds"""
+    if not samples:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[max(0, math.ceil(p * len(ordered)) - 1)] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered) * 1000,
+        'p50': rank(0.50),
+        'p95': rank(0.95),
+        'p99': rank(0.99),
+        'max': ordered[-1] * 1000
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _instrument(bot: Any, name: str, stage: str, samples: Dict[str, List[float]]) -> None:
+    """Shadow a bot method with a timing wrapper on this instance only"""
+    original: Callable[..., Any] = getattr(bot, name)
+
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            samples[stage].append(time.perf_counter() - start)
+
+    setattr(bot, name, timed)
+
+def _configure_environment(args: argparse.Namespace, stubs: StubEnvironment, workdir: str) -> None:
+    """Point every external dependency at the stubs; must run before config is imported"""
+    os.environ.update({
+        'COINGECKO_BASE_URL': stubs.coingecko.base_url,
+        'COINCAP_BASE_URL': stubs.coincap.base_url,
+        'COINCAP_API_KEY': 'benchmark-key',
+        'PRICE_SOURCES': args.price_sources,
+        'CLAUDE_BASE_URL': stubs.anthropic.base_url,
+        'CLAUDE_API_KEY': 'benchmark-key',
+        'TWITTER_BASE_URL': stubs.twitter.base_url,
+        'TWITTER_USERNAME': 'benchmark',
+        'TWITTER_PASSWORD': 'benchmark',
+        'DATABASE_PATH': os.path.join(workdir, 'market_data.db'),
+        'CACHE_DIR': os.path.join(workdir, 'cache'),
+        'CHROME_PROFILE_DIR': os.path.join(workdir, 'profile'),
+        'COOKIE_JAR_PATH': os.path.join(workdir, 'cookies.json'),
+        'TRACKED_ASSET_COUNT': str(args.assets),
+        'ANALYSIS_CACHE_ENABLED': 'true' if args.analysis_cache else 'false',
+        'BROWSER_LEAN_MODE': 'true',
+        'BROWSER_STANDBY_ENABLED': 'false',
+        'METRICS_PORT': '0',
+        'TRACING_ENABLED': 'false'
+    })
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+def _parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Total `import bot` time and self time summed per top-level package, in milliseconds"""
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+        if name.strip() == 'bot':
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+def profile_startup(args: argparse.Namespace) -> Dict[str, Any]:
+    """Import cost of `bot` and construction cost of each lazy singleton, each in a fresh interpreter"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    totals: List[float] = []
+    packages: Dict[str, List[float]] = {}
+    for _ in range(args.startup_runs):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import bot'],
+            cwd=root, capture_output=True, text=True, timeout=120
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import bot failed: {completed.stderr.strip().splitlines()[-1]}")
+        total, per_package = _parse_importtime(completed.stderr)
+        totals.append(total)
+        for package, ms in per_package.items():
+            packages.setdefault(package, []).append(ms)
+
+    probe = subprocess.run(
+        [sys.executable, '-c', SINGLETON_PROBE % (SINGLETONS,)],
+        cwd=root, capture_output=True, text=True, timeout=120
+    )
+    if probe.returncode != 0:
+        raise RuntimeError(f"Singleton probe failed: {probe.stderr.strip().splitlines()[-1]}")
+    singletons = json.loads(probe.stdout.strip().splitlines()[-1])
+
+    ranked = sorted(((package, _median(values)) for package, values in packages.items()),
+                    key=lambda item: item[1], reverse=True)
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'startup': {
+            'runs': args.startup_runs,
+            'import_bot_ms': {'median': _median(totals), 'min': min(totals), 'max': max(totals)},
+            'packages_ms': dict(ranked[:args.startup_top]),
+            'singletons_ms': singletons['timings'],
+            'heavy_modules_loaded': singletons['heavy_loaded']
+        }
+    }
+
+def print_startup_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    startup = result['startup']
+    timing = startup['import_bot_ms']
+    line = (f"\nimport bot: median {timing['median']:.1f}ms "
+            f"(min {timing['min']:.1f}, max {timing['max']:.1f}) over {startup['runs']} runs")
+    base = (baseline or {}).get('startup', {}).get('import_bot_ms', {}).get('median')
+    if base:
+        line += f", {(timing['median'] - base) / base * 100:+.1f}% vs base"
+    print(line)
+
+    print(f"\n{'package':<28}{'self ms':>10}")
+    for package, ms in startup['packages_ms'].items():
+        print(f"{package:<28}{ms:>10.1f}")
+
+    print(f"\n{'singleton':<28}{'build ms':>10}")
+    for name, ms in startup['singletons_ms'].items():
+        print(f"{name:<28}{ms:>10.1f}" if ms is not None else f"{name:<28}{'at import':>10}")
+    if startup['heavy_modules_loaded']:
+        print(f"\nLoaded by import bot: {', '.join(startup['heavy_modules_loaded'])}")
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    stubs = StubEnvironment.start(
+        coingecko=StubBehavior(args.coingecko_latency, args.jitter, args.coingecko_failure_rate,
+                               429 if args.retry_after is not None else 500, args.seed, args.retry_after,
+                               args.coingecko_slow_rate, args.coingecko_slow_latency),
+        anthropic=StubBehavior(args.claude_latency, args.jitter, args.claude_failure_rate, 529, args.seed,
+                               args.retry_after),
+        twitter=StubBehavior(args.twitter_latency, args.jitter, seed=args.seed),
+        coincap=StubBehavior(args.coincap_latency, args.jitter, args.coincap_failure_rate, seed=args.seed),
+        asset_count=args.assets,
+        token_delay=args.token_delay,
+        batch_latency=args.batch_latency
+    )
+    workdir = tempfile.mkdtemp(prefix='correlation-bench-')
+    _configure_environment(args, stubs, workdir)
+
+    # Deferred: config reads the environment prepared above at import time
+    from utils.logger import logger
+    from config import config
+    from bot import ETHBTCCorrelationBot
+
+    if args.quiet:
+        for quieted in (logger.logger, logger.coingecko_logger, logger.claude_logger):
+            quieted.setLevel(logging.WARNING)
+    if not args.http_cache:
+        config.COINGECKO_CACHE_TTL = {}
+
+    process = psutil.Process()
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    rss_samples: List[int] = [process.memory_info().rss]
+    browser_rss: List[float] = []
+    completed = 0
+    pair_analysis: Optional[Dict[str, Any]] = None
+    crypto_data = None
+
+    bot = ETHBTCCorrelationBot()
+    _instrument(bot, '_setup_browser', 'setup', samples)
+    _instrument(bot, '_get_crypto_data', 'fetch', samples)
+    _instrument(bot, '_update_correlation', 'correlation', samples)
+    _instrument(bot, '_analyze_market_sentiment', 'analysis', samples)
+
+    try:
+        if args.skip_browser:
+            # Analysis-only mode: the cycle runs up to the tweet text and skips posting
+            bot._ensure_browser = lambda: True
+            bot._post_analysis = lambda tweet_text: True
+        else:
+            _instrument(bot, '_post_analysis', 'post', samples)
+            if not bot._setup_browser():
+                raise RuntimeError("Browser setup against the Twitter stub failed")
+
+        started = time.perf_counter()
+        for cycle in range(args.cycles):
+            analyses_before = len(samples['analysis'])
+            cycle_start = time.perf_counter()
+            crypto_data = bot._run_correlation_cycle() or crypto_data
+            samples['cycle'].append(time.perf_counter() - cycle_start)
+            if len(samples['analysis']) > analyses_before:
+                completed += 1
+
+            rss_samples.append(process.memory_info().rss)
+            if not args.skip_browser:
+                sample = bot.watchdog.sample()
+                if sample:
+                    browser_rss.append(sample.rss_mb)
+            if args.interval:
+                time.sleep(args.interval)
+        elapsed = time.perf_counter() - started
+
+        if args.pairs and crypto_data:
+            pair_analysis = run_pair_analysis(bot, crypto_data, args.pairs)
+    finally:
+        bot._cleanup()
+        stubs.stop()
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'stages': {stage: percentiles(values) for stage, values in samples.items()},
+        'throughput': {
+            'cycles': args.cycles,
+            'cycles_with_analysis': completed,
+            'elapsed_s': elapsed,
+            'cycles_per_minute': args.cycles / elapsed * 60 if elapsed else None,
+            'tweets_posted': len(stubs.twitter.tweets),
+            'claude_tokens_streamed': stubs.anthropic.streamed_tokens
+        },
+        'memory': {
+            'process_rss_start_mb': rss_samples[0] / 1024 / 1024,
+            'process_rss_peak_mb': max(rss_samples) / 1024 / 1024,
+            'process_rss_end_mb': rss_samples[-1] / 1024 / 1024,
+            'browser_rss_peak_mb': max(browser_rss) if browser_rss else None
+        },
+        'pair_analysis': pair_analysis,
+        'stubs': {
+            name: {'requests': server.requests, 'injected_failures': server.failures, 'bytes_sent': server.bytes_sent}
+            for name, server in (('coingecko', stubs.coingecko), ('coincap', stubs.coincap),
+                                 ('anthropic', stubs.anthropic), ('twitter', stubs.twitter))
+        }
+    }
+
+def run_pair_analysis(bot: Any, crypto_data: Any, count: int) -> Dict[str, Any]:
+    """Analyze the top assets against BTC with batched messages.create calls, then as one Message Batch"""
+    pair_ids = [f"{symbol}/BTC" for symbol in crypto_data.symbols if symbol != 'BTC'][:count]
+
+    start = time.perf_counter()
+    batched = bot.analyze_pairs(crypto_data, pair_ids)
+    batched_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = bot.backfill_pairs(crypto_data, pair_ids, poll_interval=0.2, timeout=60)
+    bulk_s = time.perf_counter() - start
+
+    return {
+        'pairs': len(pair_ids),
+        'batched': {'parsed': len(batched), 'elapsed_s': batched_s},
+        'bulk': {'parsed': len(bulk), 'elapsed_s': bulk_s}
+    }
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def fmt(value: Optional[float]) -> str:
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    print(f"\n{'stage':<12}{'count':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          + (f"{'p95 vs base':>14}" if baseline else ""))
+    for stage, stats in result['stages'].items():
+        line = f"{stage:<12}{stats['count']:>6} {fmt(stats['p50'])} {fmt(stats['p95'])} {fmt(stats['p99'])} {fmt(stats['max'])}"
+        if baseline:
+            base = baseline.get('stages', {}).get(stage, {}).get('p95')
+            if base and stats['p95'] is not None:
+                line += f"{(stats['p95'] - base) / base * 100:+13.1f}%"
+        print(line)
+
+    throughput = result['throughput']
+    memory = result['memory']
+    print(f"\n{throughput['cycles']} cycles in {throughput['elapsed_s']:.1f}s "
+          f"({throughput['cycles_per_minute']:.1f}/min), {throughput['tweets_posted']} tweets posted")
+    coingecko = result['stubs']['coingecko']
+    print(f"CoinGecko: {coingecko['requests']} requests, {coingecko['bytes_sent'] / 1024:.1f}KB on the wire "
+          f"({coingecko['bytes_sent'] / 1024 / max(throughput['cycles'], 1):.1f}KB/cycle)")
+    coincap = result['stubs'].get('coincap')
+    if coincap and coincap['requests']:
+        print(f"CoinCap: {coincap['requests']} requests (hedges and failovers), {coincap['bytes_sent'] / 1024:.1f}KB on the wire")
+    pairs = result.get('pair_analysis')
+    if pairs:
+        print(f"Pair analysis ({pairs['pairs']} pairs): batched {pairs['batched']['parsed']} parsed in "
+              f"{pairs['batched']['elapsed_s']:.2f}s, Message Batch {pairs['bulk']['parsed']} parsed in "
+              f"{pairs['bulk']['elapsed_s']:.2f}s")
+    print(f"Process RSS peak {memory['process_rss_peak_mb']:.1f}MB"
+          + (f", Chrome RSS peak {memory['browser_rss_peak_mb']:.0f}MB" if memory['browser_rss_peak_mb'] else ""))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=100, help='Assets served by the CoinGecko stub')
+    parser.add_argument('--interval', type=float, default=0.0, help='Seconds to sleep between cycles')
+    parser.add_argument('--coingecko-latency', type=float, default=0.15)
+    parser.add_argument('--coingecko-failure-rate', type=float, default=0.0)
+    parser.add_argument('--coingecko-slow-rate', type=float, default=0.0, help='Fraction of CoinGecko responses delayed')
+    parser.add_argument('--coingecko-slow-latency', type=float, default=5.0, help='Extra seconds for a delayed response')
+    parser.add_argument('--coincap-latency', type=float, default=0.2)
+    parser.add_argument('--coincap-failure-rate', type=float, default=0.0)
+    parser.add_argument('--price-sources', default='coingecko,coincap', help='PRICE_SOURCES for the run')
+    parser.add_argument('--claude-latency', type=float, default=0.4, help='Time to first token')
+    parser.add_argument('--claude-failure-rate', type=float, default=0.0)
+    parser.add_argument('--pairs', type=int, default=0,
+                        help='After the cycles, analyze this many pairs batched and through a Message Batch')
+    parser.add_argument('--batch-latency', type=float, default=1.0, help='Seconds a stub Message Batch takes')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='Seconds between streamed tokens')
+    parser.add_argument('--twitter-latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--retry-after', type=float, help='Injected failures become 429/529 with this Retry-After')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--http-cache', action='store_true', help='Keep the CoinGecko response cache TTLs')
+    parser.add_argument('--analysis-cache', action='store_true', help='Enable the Claude analysis cache')
+    parser.add_argument('--skip-browser', action='store_true', help='Stop each cycle before posting')
+    parser.add_argument('--quiet', action='store_true', help='Only log warnings and errors')
+    parser.add_argument('--startup', action='store_true', help='Profile import and singleton startup cost instead')
+    parser.add_argument('--startup-runs', type=int, default=5)
+    parser.add_argument('--startup-top', type=int, default=15, help='Packages listed in the startup report')
+    parser.add_argument('--output', help='Result file (default bench_results/bench-<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare p95 latencies against')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    result = profile_startup(args) if args.startup else run_benchmark(args)
+
+    output = args.output or os.path.join(
+        'bench_results',
+        f"{'startup' if args.startup else 'bench'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    if args.startup:
+        print_startup_report(result, baseline)
+    else:
+        print_report(result, baseline)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
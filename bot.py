@@ -1,65 +1,127 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from typing import Dict, Optional, Any, Union
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
 import sys
-import os
 import time
-import requests
+import asyncio
+import numpy as np
 from datetime import datetime
-import anthropic
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 
 from utils.logger import logger
-from utils.browser import browser
+from utils.browser import BrowserSetup, browser_pool
+from utils.storage import market_store
+from utils.correlation import CorrelationEngine, CorrelationMatrix
+from utils.coingecko import coingecko_client
+from utils.market import MarketBatch, MarketSnapshot
+from utils.cache import AnalysisCache
+from utils.batch_analysis import BatchAnalyzer, BulkAnalysisQueue, PairData
+from utils.watchdog import BrowserWatchdog
+from utils.scheduler import CycleScheduler
+from utils.price_sources import HedgedPriceFetcher, build_price_sources
+from utils.resilience import service_guards
+from utils.metrics import metrics
+from utils.tracing import tracer
 from config import config
 
+if TYPE_CHECKING:
+    import anthropic
+
 class ETHBTCCorrelationBot:
     def __init__(self) -> None:
-        self.browser = browser
+        self.browser_pool = browser_pool
         self.config = config
-        self.session = requests.Session()
-        self.claude_client = anthropic.Client(api_key=self.config.CLAUDE_API_KEY)
-        self.session.timeout = (30, 90)  # (connect, read) timeouts
+        self.store = market_store
+        self.correlation = CorrelationEngine(
+            self.config.MARKET_ANALYSIS_CONFIG['historical_periods'],
+            self.config.MARKET_ANALYSIS_CONFIG['correlation_sensitivity']
+        )
+        self.coingecko = coingecko_client
+        self.analysis_cache = self._create_analysis_cache()
+        self.session = self.coingecko.session
+        self.coingecko_guard = service_guards.get('coingecko')
+        self.claude_guard = service_guards.get('claude')
+        self._claude_client: Optional['anthropic.Client'] = None
+        self._batch_analyzer: Optional[BatchAnalyzer] = None
+        self.market_matrix: Optional[CorrelationMatrix] = None
+        # Provider time of the newest stored snapshot; read from the store on first use
+        self._last_stored_at: Optional[float] = None
+        self.scheduler = self._create_scheduler()
+        self.price_fetcher = self._create_price_fetcher()
+        self.watchdog = BrowserWatchdog(
+            self.browser,
+            max_rss_mb=self.config.BROWSER_WATCHDOG_CONFIG['max_rss_mb'],
+            max_cpu_percent=self.config.BROWSER_WATCHDOG_CONFIG['max_cpu_percent'],
+            max_page_loads=self.config.BROWSER_WATCHDOG_CONFIG['max_page_loads'],
+            cpu_breaches=self.config.BROWSER_WATCHDOG_CONFIG['cpu_breaches']
+        )
         logger.log_startup()
+        self._warm_correlation_engine()
+
+    @property
+    def browser(self) -> BrowserSetup:
+        """The pool's active driver; changes after a failover"""
+        return self.browser_pool.active
 
-    def start(self) -> None:
+    @property
+    def claude_client(self) -> 'anthropic.Client':
+        """Claude client, created on first use so the SDK is only imported when analysing"""
+        if self._claude_client is None:
+            import anthropic
+            self._claude_client = anthropic.Client(
+                api_key=self.config.CLAUDE_API_KEY,
+                base_url=self.config.CLAUDE_BASE_URL,
+                # Retries go through claude_guard so they share its breaker and rate limit
+                max_retries=0
+            )
+        return self._claude_client
+
+    @property
+    def batch_analyzer(self) -> BatchAnalyzer:
+        if self._batch_analyzer is None:
+            self._batch_analyzer = BatchAnalyzer(self.claude_client, guard=self.claude_guard)
+        return self._batch_analyzer
+
+    def start(self, async_mode: bool = False) -> None:
         """Main bot execution loop"""
         try:
-            retry_count = 0
-            max_setup_retries = 3
+            self.config.validate('claude', 'twitter')
             
-            while retry_count < max_setup_retries:
-                if not self.browser.initialize_driver():
-                    retry_count += 1
-                    logger.logger.warning(f"Browser initialization attempt {retry_count} failed, retrying...")
-                    time.sleep(10)
-                    continue
-                    
-                if not self._login_to_twitter():
-                    retry_count += 1
-                    logger.logger.warning(f"Twitter login attempt {retry_count} failed, retrying...")
-                    time.sleep(15)
-                    continue
-                    
-                break
+            if self.config.METRICS_PORT:
+                metrics.start_http_server(self.config.METRICS_PORT, self.config.METRICS_HOST)
             
-            if retry_count >= max_setup_retries:
+            if async_mode:
+                # Deferred: aiohttp and the async SDK client are only needed in this mode
+                from utils.pipeline import AsyncCorrelationPipeline
+                # Browser setup happens on the pipeline's browser thread
+                asyncio.run(AsyncCorrelationPipeline(self).run())
+                return
+
+            if not self._setup_browser():
                 raise Exception("Failed to initialize bot after maximum retries")
 
             logger.logger.info("Bot initialized successfully")
 
             while True:
                 try:
-                    self._run_correlation_cycle()
-                    time.sleep(self.config.CORRELATION_INTERVAL * 60)
+                    reason = self.scheduler.due()
+                    if reason is None and self.scheduler.should_poll():
+                        prices = self._poll_prices()
+                        if prices:
+                            reason = self.scheduler.check_prices(prices)
+                    
+                    if reason:
+                        metrics.cycle_triggers.inc(reason=reason)
+                        crypto_data = self._run_correlation_cycle()
+                        self.scheduler.record_run(crypto_data is not None, self._reference_prices(crypto_data))
+                        self._check_browser_health()
                 except Exception as e:
                     logger.log_error("Correlation Cycle", str(e), exc_info=True)
-                    time.sleep(5 * 60)
-                    continue
+                    self.scheduler.record_run(False)
+                
+                time.sleep(self.scheduler.sleep_time())
 
         except KeyboardInterrupt:
             logger.logger.info("Bot stopped by user")
@@ -68,97 +130,323 @@ class ETHBTCCorrelationBot:
         finally:
             self._cleanup()
 
-    def _get_crypto_data(self) -> Optional[Dict[str, Any]]:
-        """Fetch BTC and ETH data from CoinGecko with retries"""
-        max_retries = 3
+    def _setup_browser(self) -> bool:
+        """Initialize the browser and log into Twitter with retries"""
         retry_count = 0
+        max_setup_retries = 3
         
-        while retry_count < max_retries:
-            try:
-                response = self.session.get(
-                    self.config.get_coingecko_markets_url(),
-                    params=self.config.get_coingecko_params(),
-                    timeout=(30, 90)
-                )
-                response.raise_for_status()
-                logger.log_coingecko_request("/markets", success=True)
-                
-                data = {coin['symbol'].upper(): coin for coin in response.json()}
-                
-                if 'BTC' not in data or 'ETH' not in data:
-                    logger.log_error("Crypto Data", "Missing BTC or ETH data")
-                    return None
+        while retry_count < max_setup_retries:
+            if not self.browser.initialize_driver():
+                retry_count += 1
+                metrics.retries.inc(operation='browser_init')
+                logger.logger.warning(f"Browser initialization attempt {retry_count} failed, retrying...")
+                time.sleep(10)
+                continue
                 
-                return data
+            if self.browser.restore_session():
+                self.browser_pool.warm_standby()
+                return True
                 
-            except requests.exceptions.Timeout:
+            with metrics.stage_latency.time(stage='login'), tracer.span('login', attempt=retry_count + 1):
+                logged_in = self._login_to_twitter()
+            if not logged_in:
                 retry_count += 1
-                wait_time = retry_count * 10
-                logger.logger.warning(f"CoinGecko timeout, attempt {retry_count}, waiting {wait_time}s...")
-                time.sleep(wait_time)
+                metrics.retries.inc(operation='login')
+                logger.logger.warning(f"Twitter login attempt {retry_count} failed, retrying...")
+                time.sleep(15)
+                continue
                 
-            except Exception as e:
-                logger.log_coingecko_request("/markets", success=False)
-                logger.log_error("CoinGecko API", str(e))
-                return None
+            self.browser.save_cookies()
+            self.browser_pool.warm_standby()
+            return True
         
-        logger.log_error("CoinGecko API", "Maximum retries reached")
-        return None
+        metrics.failures.inc(operation='browser_setup')
+        return False
+
+    def _ensure_browser(self) -> bool:
+        """Make sure the active driver responds: fail over to the standby, else cold start"""
+        if not self.browser_pool.ensure_healthy():
+            logger.logger.warning("No warm standby available, restarting browser from scratch")
+            if not self._setup_browser():
+                return False
+        if self.watchdog.browser is not self.browser:
+            self.watchdog.watch(self.browser)
+        return True
+
+    def _check_browser_health(self) -> bool:
+        """Recycle the driver between cycles if Chrome has grown too large or busy"""
+        if not self.config.BROWSER_WATCHDOG_CONFIG['enabled']:
+            return True
+        try:
+            reason = self.watchdog.check()
+        except Exception as e:
+            logger.log_error("Browser Watchdog", str(e))
+            return True
+        if reason is None:
+            return True
+        return self._recycle_browser(reason)
+
+    def _recycle_browser(self, reason: str) -> bool:
+        """Swap in the warm standby, or restart Chrome and restore the session if none is ready"""
+        sample = self.watchdog.last_sample
+        start = time.monotonic()
+        self.browser.save_cookies()
+        if self.browser_pool.failover():
+            metrics.browser_recycles.inc(mode='failover')
+            success = True
+        else:
+            metrics.browser_recycles.inc(mode='restart')
+            self.browser.close_browser()
+            success = self._setup_browser()
+        self.watchdog.watch(self.browser)
+        logger.log_browser_recycle(
+            reason,
+            rss_mb=sample.rss_mb if sample else None,
+            page_loads=sample.page_loads if sample else None,
+            duration=time.monotonic() - start,
+            success=success
+        )
+        return success
+
+    def _create_scheduler(self) -> CycleScheduler:
+        settings = self.config.SCHEDULER_CONFIG
+        return CycleScheduler(
+            interval=self.config.CORRELATION_INTERVAL * 60,
+            poll_interval=settings['poll_seconds'],
+            volatility_threshold=self.config.MARKET_ANALYSIS_CONFIG['volatility_threshold'],
+            align=settings['align_to_interval'],
+            missed_run_policy=settings['missed_run_policy'],
+            misfire_grace=settings['misfire_grace_seconds'],
+            min_trigger_gap=settings['min_trigger_gap_seconds'],
+            error_backoff=settings['error_backoff_seconds'],
+            max_error_backoff=settings['max_error_backoff_seconds']
+        )
+
+    def _create_price_fetcher(self) -> HedgedPriceFetcher:
+        settings = self.config.PRICE_SOURCE_CONFIG
+        return HedgedPriceFetcher(
+            build_price_sources(settings['sources'], self.coingecko),
+            hedge=settings['hedge_enabled'],
+            hedge_quantile=settings['hedge_quantile'],
+            initial_hedge_delay=settings['initial_hedge_delay'],
+            min_hedge_delay=settings['min_hedge_delay'],
+            max_hedge_delay=settings['max_hedge_delay'],
+            latency_window=settings['latency_window'],
+            min_samples=settings['min_samples']
+        )
+
+    def _create_analysis_cache(self) -> Optional[AnalysisCache]:
+        """Build the Claude analysis cache from ANALYSIS_CACHE_CONFIG, if enabled"""
+        cache_config = self.config.ANALYSIS_CACHE_CONFIG
+        if not cache_config['enabled']:
+            return None
+        return AnalysisCache(
+            ttl_seconds=cache_config['ttl_minutes'] * 60,
+            max_entries=cache_config['max_entries'],
+            price_bucket_pct=cache_config['price_bucket_pct'],
+            change_bucket_pct=cache_config['change_bucket_pct'],
+            volatility_threshold=self.config.MARKET_ANALYSIS_CONFIG['volatility_threshold'],
+            neighbor_tolerance=cache_config['neighbor_tolerance']
+        )
+
+    def _get_cached_analysis(self, crypto_data: MarketBatch) -> Optional[str]:
+        """Re-template an earlier analysis if the market is still in the same bucket"""
+        if not self.analysis_cache:
+            return None
+        btc, eth = crypto_data['BTC'], crypto_data['ETH']
+        analysis = self.analysis_cache.get(self.analysis_cache.quantize(btc, eth))
+        if analysis is None:
+            return None
+        logger.logger.info("Market state unchanged, reusing cached Claude analysis")
+        return self._format_tweet_analysis(analysis, btc, eth)
+
+    def _cache_analysis(self, crypto_data: MarketBatch, analysis: str) -> None:
+        """Remember a fresh Claude analysis for the current market state"""
+        if self.analysis_cache:
+            state = self.analysis_cache.quantize(crypto_data['BTC'], crypto_data['ETH'])
+            self.analysis_cache.put(state, analysis)
+
+    def _warm_correlation_engine(self) -> None:
+        """Seed rolling correlation windows from stored history"""
+        try:
+            start = time.time() - max(self.config.MARKET_ANALYSIS_CONFIG['historical_periods']) * 3600
+            btc_ts, btc_prices = self.store.get_series('BTC', start=start)
+            eth_ts, eth_prices = self.store.get_series('ETH', start=start)
+            timestamps, btc_idx, eth_idx = np.intersect1d(btc_ts, eth_ts, return_indices=True)
+            self.correlation.warm_start(timestamps, btc_prices[btc_idx], eth_prices[eth_idx])
+        except Exception as e:
+            logger.log_error("Correlation Warm Start", str(e))
+
+    def _update_correlation(self, crypto_data: MarketBatch) -> None:
+        """Feed the latest tick to the correlation engine and log every window"""
+        # A cached response is not a new tick; it would add a zero return to every window
+        if not self.correlation.update(
+            crypto_data['BTC'].price, crypto_data['ETH'].price, timestamp=crypto_data.fetched_at
+        ):
+            return
+        for stats in self.correlation.snapshot():
+            if stats.correlation is not None:
+                logger.log_market_correlation(
+                    stats.correlation, stats.ratio_change, period_hours=stats.period_hours
+                )
+
+    def _get_crypto_data(self) -> Optional[MarketBatch]:
+        """Fetch market data for all tracked assets from the first price source to answer"""
+        result = self.price_fetcher.fetch(self.config.MARKET_DATA_FIELDS)
+        if result is None:
+            logger.log_error("Crypto Data", "No price source returned market data")
+            return None
+        coins, _, fetched_at = result
+        return self._index_crypto_data(coins, fetched_at)
+
+    def _simple_price_params(self) -> Dict[str, str]:
+        return self.coingecko.simple_price_params(['current_price'], ids=self.config.TRACKED_CRYPTO)
+
+    def _parse_simple_prices(self, data: Dict[str, Any]) -> Dict[str, float]:
+        """Map a /simple/price response to {symbol: usd price}"""
+        return {
+            info['symbol'].upper(): data[coin_id]['usd']
+            for coin_id, info in self.config.TRACKED_CRYPTO.items()
+            if data.get(coin_id, {}).get('usd')
+        }
+
+    def _poll_prices(self) -> Optional[Dict[str, float]]:
+        """Cheap single-request price check between full cycles; no retries"""
+        def poll(attempt: int) -> Any:
+            with metrics.stage_latency.time(stage='poll'), tracer.span('coingecko.poll'):
+                return self.coingecko.get_timed_json('/simple/price', self._simple_price_params(), timeout=(5, 10))
+        
+        try:
+            data, fetched_at = self.coingecko_guard.call(poll, attempts=1)
+        except Exception as e:
+            logger.log_coingecko_request("/simple/price", success=False)
+            logger.logger.warning(f"Price poll failed: {str(e)}")
+            return None
+        return self._record_poll(self._parse_simple_prices(data), fetched_at)
+
+    def _record_poll(self, prices: Dict[str, float], fetched_at: float) -> Dict[str, float]:
+        """Feed a polled BTC/ETH tick to the correlation engine
+
+        Full cycles alone are too sparse for the shortest windows: at a 30 minute
+        cadence a 1h window never holds the MIN_SAMPLES returns it needs.
+        """
+        if 'BTC' in prices and 'ETH' in prices:
+            self.correlation.update(prices['BTC'], prices['ETH'], timestamp=fetched_at)
+        return prices
+
+    def _reference_prices(self, crypto_data: Optional[MarketBatch]) -> Optional[Dict[str, float]]:
+        """Tracked asset prices a full cycle ran on, for the scheduler's move detection"""
+        if not crypto_data:
+            return None
+        return {
+            info['symbol'].upper(): crypto_data[info['symbol'].upper()].price
+            for info in self.config.TRACKED_CRYPTO.values()
+            if info['symbol'].upper() in crypto_data
+        }
+
+    def _index_crypto_data(self,
+                           coins: List[Dict[str, Any]],
+                           fetched_at: Optional[float] = None) -> Optional[MarketBatch]:
+        """Parse fetched coins into a MarketBatch, check core assets and persist the snapshot"""
+        data = MarketBatch.from_coins(coins, fetched_at)
+        
+        if 'BTC' not in data or 'ETH' not in data:
+            logger.log_error("Crypto Data", "Missing BTC or ETH data")
+            return None
+        
+        if self._last_stored_at is None:
+            self._last_stored_at = self.store.get_latest_timestamp() or 0.0
+        # A cache hit (including one from disk after a restart) replays data already stored
+        if data.fetched_at <= self._last_stored_at:
+            logger.logger.info("Market data is no newer than the last stored snapshot, not storing it again")
+            return data
+        
+        self.store.insert_snapshots(data, timestamp=data.fetched_at)
+        self._last_stored_at = data.fetched_at
+        return data
+
+    def _rank_market_pairs(self, top_n: int = 5) -> str:
+        """Rank notable pairs across all tracked assets from stored history"""
+        try:
+            periods = sorted(self.config.MARKET_ANALYSIS_CONFIG['historical_periods'])
+            now = time.time()
+            _, symbols, prices = self.store.get_matrix(start=now - periods[-1] * 3600)
+            long_matrix = CorrelationMatrix.from_prices(prices, symbols)
+            self.market_matrix = long_matrix
+            if not long_matrix.symbols:
+                return "- insufficient history"
+            
+            lines = [
+                f"- {a}/{b}: r={r:.2f}" for a, b, r in long_matrix.strongest_pairs(top_n)
+            ]
+            
+            if len(periods) > 1:
+                _, symbols, prices = self.store.get_matrix(start=now - periods[-2] * 3600)
+                short_matrix = CorrelationMatrix.from_prices(prices, symbols)
+                for a, b, r, previous in short_matrix.shifted_pairs(long_matrix, top_n=2):
+                    lines.append(
+                        f"- {a}/{b}: r={r:.2f} over {periods[-2]}h vs {previous:.2f} over {periods[-1]}h"
+                    )
+            
+            logger.logger.info(
+                f"Correlation matrix: {len(long_matrix.symbols)} assets, {long_matrix.samples} samples"
+            )
+            return "\n".join(lines) or "- none"
+        except Exception as e:
+            logger.log_error("Correlation Matrix", str(e))
+            return "- unavailable"
+
     def _login_to_twitter(self) -> bool:
         """Log into Twitter using environment credentials with enhanced verification"""
         try:
             logger.logger.info("Starting Twitter login sequence")
             self.browser.driver.set_page_load_timeout(45)
-            self.browser.driver.get('https://twitter.com/login')
+            self.browser.navigate(f'{self.config.TWITTER_BASE_URL}/login')
             logger.logger.info("Navigated to Twitter login page")
-            time.sleep(5)  # Wait for initial page load
 
-            # Enhanced username entry with WebDriverWait
+            # Username field doubles as the page-ready signal
             logger.logger.info("Attempting to enter username...")
             try:
-                username_field = WebDriverWait(self.browser.driver, 20).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[autocomplete='username']"))
+                username_field = self.browser.waits.interactable(
+                    'login_username', [(By.CSS_SELECTOR, "input[autocomplete='username']")], initial=20
                 )
+                if not username_field:
+                    raise TimeoutException("Username field not interactable")
                 username_field.click()
-                time.sleep(1)
                 username_field.send_keys(self.config.TWITTER_USERNAME)
                 logger.logger.info("Username entered successfully")
             except Exception as e:
                 logger.log_error("Twitter Login", f"Failed to enter username: {str(e)}")
                 return False
 
-            time.sleep(2)
-
-            # Click next button using explicit wait
+            # Click next button once it is interactable
             logger.logger.info("Attempting to click next button...")
             try:
-                next_button = WebDriverWait(self.browser.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//span[text()='Next']"))
+                next_button = self.browser.waits.interactable(
+                    'login_next', [(By.XPATH, "//span[text()='Next']")]
                 )
+                if not next_button:
+                    raise TimeoutException("Next button not interactable")
                 next_button.click()
                 logger.logger.info("Next button clicked successfully")
             except Exception as e:
                 logger.log_error("Twitter Login", f"Failed to click next: {str(e)}")
                 return False
 
-            time.sleep(3)
-
-            # Enhanced password entry with WebDriverWait
             logger.logger.info("Attempting to enter password...")
             try:
-                password_field = WebDriverWait(self.browser.driver, 20).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[type='password']"))
+                password_field = self.browser.waits.interactable(
+                    'login_password', [(By.CSS_SELECTOR, "input[type='password']")], initial=20
                 )
+                if not password_field:
+                    raise TimeoutException("Password field not interactable")
                 password_field.click()
-                time.sleep(1)
                 password_field.send_keys(self.config.TWITTER_PASSWORD)
                 logger.logger.info("Password entered successfully")
             except Exception as e:
                 logger.log_error("Twitter Login", f"Failed to enter password: {str(e)}")
                 return False
 
-            time.sleep(2)
-
             # Take debug screenshot before login attempt
             self.browser.driver.save_screenshot("login_page_debug.png")
             logger.logger.info("Saved debug screenshot before login attempt")
@@ -166,18 +454,20 @@ class ETHBTCCorrelationBot:
             # Enhanced login button click using explicit XPath
             logger.logger.info("Attempting to click login button...")
             try:
-                login_button = WebDriverWait(self.browser.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//span[text()='Log in']"))
+                login_button = self.browser.waits.interactable(
+                    'login_submit', [(By.XPATH, "//span[text()='Log in']")]
                 )
+                if not login_button:
+                    raise TimeoutException("Login button not interactable")
                 login_button.click()
                 logger.logger.info("Login button clicked successfully")
             except Exception as e:
                 logger.log_error("Twitter Login", f"Failed to click login: {str(e)}")
                 return False
 
-            # Wait 10 seconds for 2FA input
-            logger.logger.info("Waiting 10 seconds for 2FA/Authy code input...")
-            time.sleep(10)
+            # Returns as soon as Twitter leaves the login flow; leaves time for 2FA/Authy input
+            logger.logger.info("Waiting for login flow to complete (2FA/Authy code if prompted)...")
+            self.browser.waits.url_leaves(['/login', '/flow'], name='login_redirect')
 
             # Verify successful login
             return self._verify_login()
@@ -196,33 +486,23 @@ class ETHBTCCorrelationBot:
             while retry_count < max_retries:
                 logger.logger.info(f"Verification attempt {retry_count + 2}/{max_retries}")
                 
-                verification_methods = [
-                    lambda: WebDriverWait(self.browser.driver, 30).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="SideNav_NewTweet_Button"]'))
-                    ),
-                    lambda: WebDriverWait(self.browser.driver, 30).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="AppTabBar_Profile_Link"]'))
-                    ),
-                    lambda: WebDriverWait(self.browser.driver, 30).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="primaryColumn"]'))
-                    ),
-                    lambda: any(path in self.browser.driver.current_url 
-                              for path in ['home', 'twitter.com/home'])
-                ]
-                
-                for i, method in enumerate(verification_methods, 1):
-                    try:
-                        if method():
-                            logger.logger.info(f"Login verified successfully using method {i}")
-                            return True
-                    except Exception as e:
-                        logger.logger.debug(f"Error in verification method {i}: {str(e)}")
+                result = self.browser.wait_for_any(
+                    [
+                        (By.CSS_SELECTOR, '[data-testid="SideNav_NewTweet_Button"]'),
+                        (By.CSS_SELECTOR, '[data-testid="AppTabBar_Profile_Link"]'),
+                        (By.CSS_SELECTOR, '[data-testid="primaryColumn"]'),
+                        ('url', 'home')
+                    ],
+                    timeout=30,
+                    key='login_verification'
+                )
+                if result:
+                    logger.logger.info(f"Login verified successfully using {result[0][1]}")
+                    return True
                 
                 retry_count += 1
                 if retry_count < max_retries:
-                    wait_time = 8 * retry_count
-                    logger.logger.info(f"Verification attempt failed, waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
+                    logger.logger.info("Verification attempt failed, refreshing page...")
                     self.browser.wait_and_refresh(timeout=10)
             
             logger.log_error("Login Verification", f"Failed to verify login after {max_retries} attempts")
@@ -232,51 +512,128 @@ class ETHBTCCorrelationBot:
             logger.log_error("Login Verification", f"Verification failed: {str(e)}")
             return False
 
-    def _analyze_market_sentiment(self, crypto_data: Dict[str, Any]) -> Optional[str]:
-        """Use Claude to analyze market sentiment and correlation with retries"""
-        max_retries = 3
-        retry_count = 0
+    def _analyze_market_sentiment(self, crypto_data: MarketBatch) -> Optional[str]:
+        """Use Claude to analyze market sentiment and correlation through the Claude guard"""
+        cached_tweet = self._get_cached_analysis(crypto_data)
+        if cached_tweet:
+            return cached_tweet
         
-        while retry_count < max_retries:
-            try:
-                btc = crypto_data['BTC']
-                eth = crypto_data['ETH']
-                
-                prompt = self.config.CLAUDE_ANALYSIS_PROMPT.format(
-                    btc_price=btc['current_price'],
-                    btc_change=btc['price_change_percentage_24h'],
-                    btc_volume=btc['total_volume'],
-                    eth_price=eth['current_price'],
-                    eth_change=eth['price_change_percentage_24h'],
-                    eth_volume=eth['total_volume']
-                )
-                
-                response = self.claude_client.messages.create(
+        btc = crypto_data['BTC']
+        eth = crypto_data['ETH']
+        prompt = self._build_analysis_prompt(crypto_data)
+        budget = self._analysis_budget(btc, eth)
+        
+        def stream_analysis(attempt: int) -> str:
+            with tracer.span('claude.stream', attempt=attempt, budget=budget) as span:
+                analysis = ""
+                with metrics.stage_latency.time(stage='claude'), self.claude_client.messages.stream(
                     model=self.config.CLAUDE_MODEL,
                     max_tokens=250,
                     messages=[{"role": "user", "content": prompt}]
-                )
-                
-                analysis = response.content[0].text
-                return self._format_tweet_analysis(analysis, btc, eth)
-                
-            except Exception as e:
-                retry_count += 1
-                wait_time = retry_count * 10
-                logger.logger.warning(f"Claude API error, attempt {retry_count}, waiting {wait_time}s...")
-                time.sleep(wait_time)
+                ) as stream:
+                    for text in stream.text_stream:
+                        analysis += text
+                        if len(analysis) >= budget:
+                            # Leaving the context closes the stream; no more tokens are generated
+                            logger.claude_logger.info(f"Stopped Claude stream early at {len(analysis)} chars")
+                            break
+                span.set_attribute('chars', len(analysis))
+            return analysis
+        
+        try:
+            analysis = self.claude_guard.call(stream_analysis)
+        except Exception as e:
+            logger.log_error("Market Sentiment Analysis", str(e))
+            return None
+        
+        analysis = self._trim_analysis(analysis, budget)
+        self._cache_analysis(crypto_data, analysis)
+        return self._format_tweet_analysis(analysis, btc, eth)
+
+    def analyze_pairs(self, crypto_data: MarketBatch, pair_ids: List[str]) -> Dict[str, str]:
+        """Analyze several 'BASE/QUOTE' pairs with batched Claude requests"""
+        return self.batch_analyzer.analyze(self._pair_data(crypto_data, pair_ids))
+
+    def backfill_pairs(self,
+                       crypto_data: MarketBatch,
+                       pair_ids: List[str],
+                       poll_interval: float = 30,
+                       timeout: float = 24 * 3600) -> Dict[str, str]:
+        """Analyze pairs offline through the Message Batches API and wait for the results"""
+        queue = BulkAnalysisQueue(self.batch_analyzer, poll_interval=poll_interval)
+        queue.add(self._pair_data(crypto_data, pair_ids), prefix='backfill')
+        batch_id = queue.submit()
+        if batch_id is None:
+            return {}
+        return queue.collect(batch_id, timeout=timeout)
+
+    def _pair_data(self, crypto_data: MarketBatch, pair_ids: List[str]) -> Dict[str, PairData]:
+        """Market data and correlation for each 'BASE/QUOTE' pair that has both sides"""
+        pairs: Dict[str, PairData] = {}
+        for pair_id in pair_ids:
+            base, _, quote = pair_id.upper().partition('/')
+            if base not in crypto_data or quote not in crypto_data:
+                logger.logger.warning(f"No market data for pair {pair_id}, skipping")
                 continue
+            pairs[pair_id] = {
+                'base': crypto_data[base],
+                'quote': crypto_data[quote],
+                'correlation': self.market_matrix.get(base, quote) if self.market_matrix else None
+            }
+        return pairs
+
+    def _build_analysis_prompt(self, crypto_data: MarketBatch) -> str:
+        """Fill the Claude analysis prompt from market data and correlation state"""
+        btc = crypto_data['BTC']
+        eth = crypto_data['ETH']
         
-        logger.log_error("Market Sentiment Analysis", "Maximum retries reached")
-        return None
+        return self.config.CLAUDE_ANALYSIS_PROMPT.format(
+            btc_price=btc.price,
+            btc_change=self._format_change(btc.change_24h),
+            btc_volume=self._format_volume(btc.volume),
+            eth_price=eth.price,
+            eth_change=self._format_change(eth.change_24h),
+            eth_volume=self._format_volume(eth.volume),
+            correlation_summary=self.correlation.summary(),
+            notable_pairs=self._rank_market_pairs()
+        )
 
-    def _format_tweet_analysis(self, analysis: str, btc: Dict[str, Any], eth: Dict[str, Any]) -> str:
-        """Format Claude's analysis for Twitter, respecting length constraints"""
-        base_tweet = (
+    @staticmethod
+    def _format_change(change: Optional[float]) -> str:
+        # Sources may leave a change out (CoinCap, or a null from CoinGecko)
+        return 'n/a' if change is None else f"{change:.2f}%"
+
+    @staticmethod
+    def _format_volume(volume: Optional[float]) -> str:
+        return 'n/a' if volume is None else f"${volume:,.0f}"
+
+    def _tweet_header(self, btc: MarketSnapshot, eth: MarketSnapshot) -> str:
+        """Price header that precedes Claude's analysis in every tweet"""
+        return (
             f"ETH/BTC Market Pulse - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"BTC: ${btc['current_price']:,.2f} ({btc['price_change_percentage_24h']:.2f}%)\n"
-            f"ETH: ${eth['current_price']:,.2f} ({eth['price_change_percentage_24h']:.2f}%)\n\n"
+            f"BTC: ${btc.price:,.2f} ({self._format_change(btc.change_24h)})\n"
+            f"ETH: ${eth.price:,.2f} ({self._format_change(eth.change_24h)})\n\n"
         )
+
+    def _analysis_budget(self, btc: MarketSnapshot, eth: MarketSnapshot) -> int:
+        """Characters of analysis that fit after the header within MAX_LENGTH"""
+        return self.config.TWEET_CONSTRAINTS['MAX_LENGTH'] - len(self._tweet_header(btc, eth))
+
+    def _trim_analysis(self, analysis: str, budget: int) -> str:
+        """Cut streamed text to the budget at a sentence, or failing that a word, boundary"""
+        analysis = analysis.strip()
+        if len(analysis) <= budget:
+            return analysis
+        
+        cut = analysis[:budget]
+        sentence_end = max(cut.rfind('. '), cut.rfind('! '), cut.rfind('? '), cut.rfind('\n'))
+        if sentence_end >= budget // 2:
+            return cut[:sentence_end + 1].strip()
+        return cut.rsplit(' ', 1)[0].rstrip(',;:-')
+
+    def _format_tweet_analysis(self, analysis: str, btc: MarketSnapshot, eth: MarketSnapshot) -> str:
+        """Format Claude's analysis for Twitter, respecting length constraints"""
+        base_tweet = self._tweet_header(btc, eth)
         
         full_tweet = base_tweet + analysis
         
@@ -296,88 +653,95 @@ class ETHBTCCorrelationBot:
         
         while retry_count < max_retries:
             try:
-                # Navigate to compose tweet page
-                self.browser.driver.get('https://twitter.com/compose/tweet')
-                time.sleep(3)
-                
-                # Use WebDriverWait for tweet text area
-                text_area = WebDriverWait(self.browser.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="tweetTextarea_0"]'))
-                )
-                text_area.click()
-                time.sleep(1)
-                text_area.send_keys(tweet_text)
-                time.sleep(2)
-
-                # Enhanced post button detection and clicking
-                post_button_locators = [
-                    (By.CSS_SELECTOR, '[data-testid="tweetButton"]'),
-                    (By.XPATH, "//div[@role='button'][contains(., 'Post')]"),
-                    (By.XPATH, "//span[text()='Post']")
-                ]
-
-                post_button = None
-                for locator in post_button_locators:
-                    try:
-                        post_button = WebDriverWait(self.browser.driver, 5).until(
-                            EC.element_to_be_clickable(locator)
-                        )
-                        if post_button:
-                            break
-                    except:
-                        continue
-
-                if post_button:
-                    # Scroll to button and click
-                    self.browser.driver.execute_script("arguments[0].scrollIntoView(true);", post_button)
-                    time.sleep(1)
-                    post_button.click()
-                    time.sleep(5)
-                    logger.logger.info("Tweet posted successfully")
-                    return True
-                else:
-                    raise Exception("Could not find post button")
+                with tracer.span('twitter.post', attempt=retry_count + 1, browser=self.browser.name) as span:
+                    # Navigate to compose tweet page
+                    self.browser.navigate(f'{self.config.TWITTER_BASE_URL}/compose/tweet')
+                    # Let the editor finish hydrating so it handles the insert; polling
+                    # connections can keep the page busy, so the budget stays short and
+                    # the batch's own waits take over on timeout
+                    self.browser.waits.network_idle('compose_idle', initial=5, maximum=5)
+                    
+                    # Typing, clicking Post and confirming all happen in one script round trip
+                    result = self.browser.post_text(tweet_text)
+                    span.set_attribute('step', result.get('step'))
+                    if result['ok']:
+                        logger.logger.info(f"Tweet posted successfully in {result['elapsed'] / 1000:.2f}s")
+                        return True
+                    if result.get('op') == 'wait_any':
+                        logger.logger.warning("Tweet submitted but no confirmation was observed")
+                        return True
+                    raise Exception(f"Posting stopped at step {result.get('step')} ({result.get('op')}): {result['error']}")
                 
             except Exception as e:
                 retry_count += 1
+                metrics.retries.inc(operation='post')
+                # A dead driver won't recover by waiting; swap it out and retry right away
+                if not self.browser.is_alive():
+                    logger.logger.warning(f"Browser died while posting: {str(e)}")
+                    if self._ensure_browser():
+                        continue
                 wait_time = retry_count * 10
                 logger.logger.warning(f"Tweet posting error, attempt {retry_count}, waiting {wait_time}s...")
                 time.sleep(wait_time)
                 continue
         
         logger.log_error("Tweet Creation", "Maximum retries reached")
+        metrics.failures.inc(operation='post')
         return False
 
-    def _run_correlation_cycle(self) -> None:
-        """Run correlation analysis and posting cycle"""
+    def _run_correlation_cycle(self) -> Optional[MarketBatch]:
+        """Run correlation analysis and posting cycle; returns its market data, or None on failure"""
         try:
-            crypto_data = self._get_crypto_data()
-            if not crypto_data:
-                return
-            
-            tweet_text = self._analyze_market_sentiment(crypto_data)
-            if not tweet_text:
-                return
+            with metrics.stage_latency.time(stage='cycle'), tracer.span('cycle'):
+                with metrics.stage_latency.time(stage='fetch'), tracer.span('fetch'):
+                    crypto_data = self._get_crypto_data()
+                if not crypto_data:
+                    return None
+                
+                self._update_correlation(crypto_data)
+                
+                with tracer.span('analyze'):
+                    tweet_text = self._analyze_market_sentiment(crypto_data)
+                if not tweet_text:
+                    return crypto_data
+                
+                if not self._ensure_browser():
+                    logger.log_error("Correlation Cycle", "No working browser available for posting")
+                    return crypto_data
+                
+                with metrics.stage_latency.time(stage='post'), tracer.span('post'):
+                    self._post_analysis(tweet_text)
             
-            self._post_analysis(tweet_text)
+            wait_averages = ", ".join(
+                f"{name}={seconds:.2f}s" for name, seconds in self.browser.waits.summary().items()
+            )
+            logger.logger.info(f"Browser wait averages: {wait_averages}")
+            return crypto_data
         
         except Exception as e:
+            metrics.failures.inc(operation='cycle')
             logger.log_error("Correlation Cycle", str(e))
+            return None
+        finally:
+            if self.config.METRICS_TEXTFILE_PATH:
+                metrics.write_textfile(self.config.METRICS_TEXTFILE_PATH)
 
     def _cleanup(self) -> None:
         """Cleanup resources"""
         try:
-            if self.browser:
+            if self.browser_pool:
                 logger.logger.info("Closing browser...")
                 try:
-                    self.browser.close_browser()
+                    self.browser_pool.close()
                     time.sleep(1)
                 except Exception as e:
                     logger.logger.warning(f"Error during browser close: {str(e)}")
+            self.store.close()
+            metrics.stop_http_server()
             logger.log_shutdown()
         except Exception as e:
             logger.log_error("Cleanup", str(e))
 
 if __name__ == "__main__":
     bot = ETHBTCCorrelationBot()
-    bot.start()    
+    bot.start(async_mode='--async' in sys.argv)    
@@ -1,36 +1,58 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from typing import Optional, Union, Any
+from typing import Optional, Any, List, Dict, Tuple, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
 import os
+import json
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import (
-    TimeoutException,
     NoSuchElementException,
     WebDriverException,
     JavascriptException
 )
 from utils.logger import logger
+from utils.waits import WaitEngine, NETWORK_TRACKER_JS
+from utils.tracing import tracer
+from utils.lazy import LazySingleton
 from config import config
 
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.remote.webelement import WebElement
+
 class BrowserSetup:
-    def __init__(self) -> None:
-        self.driver: Optional[webdriver.Chrome] = None
-        self.wait: Optional[WebDriverWait] = None
+    def __init__(self, profile_dir: Optional[str] = None, name: str = 'primary') -> None:
+        self.name: str = name
+        self.driver: Optional['webdriver.Chrome'] = None
+        self.wait: Optional['WebDriverWait'] = None
         self.chrome_driver_path: str = config.CHROME_DRIVER_PATH
+        # Chrome locks a profile directory, so every driver in the pool needs its own
+        self.profile_dir: str = config.CHROME_PROFILE_DIR if profile_dir is None else profile_dir
+        self.cookie_jar_path: str = config.COOKIE_JAR_PATH
+        self._locator_winners: Dict[str, Tuple[str, str]] = {}
+        # Navigations since the driver started; long-lived tabs leak memory per load
+        self.page_loads: int = 0
+        self.waits = WaitEngine(self)
         logger.logger.info(f"ChromeDriver path set to: {self.chrome_driver_path}")
 
     def initialize_driver(self) -> bool:
         """Initialize Chrome WebDriver with specific settings"""
+        # Deferred: Selenium's driver stack and webdriver_manager cost ~0.5s to import
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.support.ui import WebDriverWait
+        from webdriver_manager.chrome import ChromeDriverManager
+
         try:
+            # A previous driver would keep the profile directory locked
+            if self.driver:
+                self.close_browser()
+            
             chrome_options = Options()
             
             # Enhanced Chrome options for stability and automation
@@ -41,9 +63,16 @@ class BrowserSetup:
             chrome_options.add_argument('--disable-extensions')
             chrome_options.add_argument('--disable-notifications')
             chrome_options.add_argument('--disable-popup-blocking')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--start-maximized')
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+            if config.BROWSER_LEAN_MODE:
+                self._apply_lean_options(chrome_options)
+            else:
+                chrome_options.add_argument('--window-size=1920,1080')
+                chrome_options.add_argument('--start-maximized')
+            
+            # Persistent profile keeps cookies and local storage across restarts
+            if self.profile_dir:
+                chrome_options.add_argument(f'--user-data-dir={os.path.abspath(self.profile_dir)}')
             
             # Add experimental options to avoid detection
             chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
@@ -60,16 +89,23 @@ class BrowserSetup:
                 options=chrome_options
             )
             
+            self.page_loads = 0
+            
             # Set page load timeout
             self.driver.set_page_load_timeout(30)
+            # DOM batches enforce their own deadline; this only guards against a hung page
+            self.driver.set_script_timeout(90)
             
             # Initialize WebDriverWait with longer timeout
             self.wait = WebDriverWait(self.driver, 20)
             
             # Execute stealth JavaScript
             self._inject_stealth_js()
+            self._install_network_tracker()
+            if config.BROWSER_LEAN_MODE:
+                self._block_heavy_resources()
             
-            logger.logger.info("Browser initialized successfully")
+            logger.logger.info(f"Browser '{self.name}' initialized successfully")
             return True
             
         except WebDriverException as e:
@@ -96,6 +132,54 @@ class BrowserSetup:
         except JavascriptException as e:
             logger.log_error("JavaScript Injection", str(e))
 
+    def _apply_lean_options(self, chrome_options: 'Options') -> None:
+        """New-style headless Chrome with a small window, capped renderers and no images"""
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--window-size=1280,900')
+        chrome_options.add_argument(f'--renderer-process-limit={config.BROWSER_RENDERER_PROCESS_LIMIT}')
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--mute-audio')
+        chrome_options.add_argument('--disable-background-networking')
+        chrome_options.add_argument('--disable-component-update')
+        chrome_options.add_argument('--disable-default-apps')
+        chrome_options.add_argument('--disable-sync')
+        chrome_options.add_argument('--disable-features=Translate,MediaRouter,OptimizationHints')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2
+        })
+        logger.logger.info("Lean browser profile enabled (headless, images disabled)")
+
+    def _block_heavy_resources(self) -> None:
+        """Block media, fonts and third-party trackers at the network layer via DevTools"""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': config.BROWSER_BLOCKED_URLS})
+            
+            # Headless Chrome advertises itself in the user agent; present as regular Chrome
+            user_agent = self.driver.execute_script("return navigator.userAgent;")
+            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+                'userAgent': user_agent.replace('HeadlessChrome', 'Chrome')
+            })
+            logger.logger.info(f"Blocking {len(config.BROWSER_BLOCKED_URLS)} resource patterns")
+        except WebDriverException as e:
+            logger.log_error("Resource Blocking", str(e))
+
+    def _install_network_tracker(self) -> None:
+        """Count in-flight requests on every page so waits can detect network idle"""
+        try:
+            self.driver.execute_cdp_cmd(
+                'Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS}
+            )
+        except WebDriverException as e:
+            logger.log_error("Network Tracker", str(e))
+
+    def navigate(self, url: str) -> None:
+        """Load url in the current tab, counting the navigation"""
+        self.page_loads += 1
+        with tracer.span('browser.navigate', url=url, browser=self.name):
+            self.driver.get(url)
+
     def js_click(self, 
                  element_identifier: str, 
                  by: str = By.CSS_SELECTOR, 
@@ -126,13 +210,12 @@ class BrowserSetup:
                         element.dispatchEvent(event);
                     });
                 }
-                arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});
-                setTimeout(function() {
-                    simulateClick(arguments[0]);
-                }, 100);
+                const target = arguments[0];
+                target.scrollIntoView({block: 'center'});
+                simulateClick(target);
                 """
+                # Events are dispatched synchronously, so the click has registered on return
                 self.driver.execute_script(js_click_script, element)
-                time.sleep(1)  # Wait for click to register
                 return True
         except Exception as e:
             logger.log_error("JavaScript Click", str(e))
@@ -229,16 +312,17 @@ class BrowserSetup:
                     });
                 }
                 
-                arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});
-                setTimeout(function() {
-                    simulateInput(arguments[0], arguments[1]);
-                }, 100);
+                arguments[0].scrollIntoView({block: 'center'});
+                simulateInput(arguments[0], arguments[1]);
                 """
                 self.driver.execute_script(js_input_script, element, text)
-                time.sleep(1)
                 
-                actual_value = self.driver.execute_script("return arguments[0].value;", element)
-                return actual_value == text
+                return bool(self.waits.until(
+                    'js_input_value',
+                    lambda: self.driver.execute_script("return arguments[0].value;", element) == text,
+                    initial=2,
+                    maximum=5
+                ))
         except Exception as e:
             logger.log_error("JavaScript Input", str(e))
             return False
@@ -283,34 +367,254 @@ class BrowserSetup:
             logger.log_error("Input Action", str(e))
             return False
 
+    # Locator resolution shared by wait_for_any and run_dom_batch
+    LOCATOR_HELPERS_JS = """
+    function candidates(by, value) {
+        if (by === 'css selector') return Array.from(document.querySelectorAll(value));
+        if (by === 'id') return [document.getElementById(value)].filter(Boolean);
+        if (by === 'name') return Array.from(document.getElementsByName(value));
+        if (by === 'xpath') {
+            const snapshot = document.evaluate(
+                value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+            );
+            const nodes = [];
+            for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+            return nodes;
+        }
+        return [];
+    }
+
+    function visible(el) {
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 &&
+            style.visibility !== 'hidden' && style.display !== 'none';
+    }
+
+    function satisfies(el, condition) {
+        if (condition === 'present') return true;
+        if (!visible(el)) return false;
+        if (condition === 'clickable') {
+            return !el.disabled && el.getAttribute('aria-disabled') !== 'true';
+        }
+        return true;
+    }
+    """
+
+    # One evaluation per poll tick checks every candidate locator in order
+    WAIT_FOR_ANY_JS = LOCATOR_HELPERS_JS + """
+    const locators = arguments[0];
+    const condition = arguments[1];
+
+    for (let i = 0; i < locators.length; i++) {
+        const [by, value] = locators[i];
+        if (by === 'url') {
+            if (window.location.href.includes(value)) return [i, null];
+            continue;
+        }
+        for (const el of candidates(by, value)) {
+            if (satisfies(el, condition)) return [i, el];
+        }
+    }
+    return null;
+    """
+
+    SUPPORTED_LOCATORS = ('css selector', 'xpath', 'id', 'name', 'url')
+
+    def wait_for_any(self,
+                     locators: List[Tuple[str, str]],
+                     timeout: float = 10,
+                     condition: str = 'present',
+                     poll_interval: float = 0.25,
+                     key: Optional[str] = None) -> Optional[Tuple[Tuple[str, str], Optional['WebElement']]]:
+        """Wait until any locator matches and return (locator, element)
+
+        condition is 'present', 'visible' or 'clickable'. A ('url', text) pseudo-locator
+        matches when the current URL contains text and returns no element. The locator
+        that won last time for the same key is tried first.
+        """
+        if not self.driver:
+            return None
+        for by, _ in locators:
+            if by not in self.SUPPORTED_LOCATORS:
+                raise ValueError(f"Unsupported locator strategy for wait_for_any: {by}")
+
+        key = key or '|'.join(value for _, value in locators)
+        ordered = list(locators)
+        preferred = self._locator_winners.get(key)
+        if preferred in ordered:
+            ordered.remove(preferred)
+            ordered.insert(0, preferred)
+
+        with tracer.span('browser.wait_for_any', key=key, condition=condition, timeout=timeout,
+                         selectors=[value for _, value in ordered]) as span:
+            deadline = time.monotonic() + timeout
+            polls = 0
+            while True:
+                polls += 1
+                try:
+                    match = self.driver.execute_script(self.WAIT_FOR_ANY_JS, [list(l) for l in ordered], condition)
+                except (JavascriptException, WebDriverException):
+                    # Page mid-navigation; try again next tick
+                    match = None
+                if match:
+                    winner = ordered[match[0]]
+                    self._locator_winners[key] = winner
+                    span.set_attribute('selector', winner[1])
+                    span.set_attribute('polls', polls)
+                    return winner, match[1]
+                if time.monotonic() >= deadline:
+                    span.set_attribute('selector', None)
+                    span.set_attribute('polls', polls)
+                    return None
+                time.sleep(poll_interval)
+
+    # Runs a list of DOM commands inside the page and reports back once, via the async callback
+    DOM_BATCH_JS = LOCATOR_HELPERS_JS + """
+    const commands = arguments[0];
+    const deadline = Date.now() + arguments[1];
+    const done = arguments[arguments.length - 1];
+    const started = performance.now();
+    let target = null;
+
+    function find(locators, condition) {
+        for (const [by, value] of locators) {
+            for (const el of candidates(by, value)) {
+                if (satisfies(el, condition)) return el;
+            }
+        }
+        return null;
+    }
+
+    function poll(check) {
+        return new Promise((resolve, reject) => {
+            (function tick() {
+                const value = check();
+                if (value) return resolve(value);
+                if (Date.now() >= deadline) return reject(new Error('timeout'));
+                setTimeout(tick, 50);
+            })();
+        });
+    }
+
+    function contentOf(el) {
+        return el.value !== undefined ? el.value : el.innerText;
+    }
+
+    // Editors render line breaks as blocks, so compare text with whitespace collapsed
+    function normalize(text) {
+        return text.replace(/\s+/g, ' ').trim();
+    }
+
+    function insertText(el, text) {
+        el.focus();
+        const before = contentOf(el).length;
+        document.execCommand('insertText', false, text);
+        if (contentOf(el).length !== before) return;
+        // Rich-text editors that ignore execCommand still accept a synthetic paste
+        const data = new DataTransfer();
+        data.setData('text/plain', text);
+        el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+    }
+
+    function click(el) {
+        el.scrollIntoView({block: 'center'});
+        ['mousedown', 'mouseup', 'click'].forEach(type => el.dispatchEvent(
+            new MouseEvent(type, {view: window, bubbles: true, cancelable: true, buttons: 1})
+        ));
+    }
+
+    (async () => {
+        for (let step = 0; step < commands.length; step++) {
+            const command = commands[step];
+            try {
+                if (command.op === 'wait') {
+                    target = await poll(() => find(command.locators, command.condition || 'visible'));
+                } else if (command.op === 'focus') {
+                    target.focus();
+                } else if (command.op === 'insert_text') {
+                    insertText(target, command.text);
+                } else if (command.op === 'expect_text') {
+                    // Editors may apply the insert asynchronously; fail rather than post other text
+                    const expected = normalize(command.text);
+                    await poll(() => normalize(contentOf(target)) === expected).catch(() => {
+                        throw new Error('text mismatch: ' + JSON.stringify(contentOf(target).slice(0, 80)));
+                    });
+                } else if (command.op === 'click') {
+                    click(target);
+                } else if (command.op === 'wait_any') {
+                    // Satisfied when any `appear` locator matches or any `gone` locator stops matching
+                    await poll(() => (command.appear || []).some(l => find([l], 'present')) ||
+                        (command.gone || []).some(l => !find([l], 'present')));
+                } else {
+                    throw new Error('unknown op ' + command.op);
+                }
+            } catch (e) {
+                return done({ok: false, step: step, op: command.op, error: String(e.message || e),
+                             elapsed: performance.now() - started});
+            }
+        }
+        done({ok: true, step: commands.length, elapsed: performance.now() - started});
+    })();
+    """
+
+    def run_dom_batch(self, commands: List[Dict[str, Any]], timeout: float = 30) -> Dict[str, Any]:
+        """Execute DOM commands in one execute_async_script round trip
+
+        Supported ops: wait (locators, condition), focus, insert_text (text), expect_text
+        (text), click and wait_any (appear/gone locators). Commands act on the element of the last wait.
+        Returns {'ok', 'step', 'op', 'error', 'elapsed'} describing where it stopped.
+        """
+        if not self.driver:
+            return {'ok': False, 'step': 0, 'error': 'no driver'}
+        for command in commands:
+            for by, _ in command.get('locators', []) + command.get('appear', []) + command.get('gone', []):
+                if by not in self.SUPPORTED_LOCATORS or by == 'url':
+                    raise ValueError(f"Unsupported locator strategy for run_dom_batch: {by}")
+
+        with tracer.span('browser.dom_batch', ops=[c['op'] for c in commands], browser=self.name) as span:
+            try:
+                result = self.driver.execute_async_script(self.DOM_BATCH_JS, commands, int(timeout * 1000))
+            except WebDriverException as e:
+                result = {'ok': False, 'step': None, 'error': f"{type(e).__name__}: {str(e)}"}
+            span.set_attribute('ok', result.get('ok'))
+            span.set_attribute('step', result.get('step'))
+            span.set_attribute('error', result.get('error'))
+            return result
+
+    def post_text(self, text: str, timeout: float = 30) -> Dict[str, Any]:
+        """Type into the compose box, click Post and wait for confirmation in one round trip"""
+        selectors = config.twitter_selectors
+        return self.run_dom_batch([
+            {'op': 'wait', 'locators': [[By.CSS_SELECTOR, selectors['tweet_input']]], 'condition': 'clickable'},
+            {'op': 'insert_text', 'text': text},
+            # Read the editor back so a dropped or doubled insert is never posted
+            {'op': 'expect_text', 'text': text},
+            # The button only enables once the editor has registered the text
+            {'op': 'wait', 'condition': 'clickable', 'locators': [
+                [By.CSS_SELECTOR, selectors['tweet_button']],
+                [By.XPATH, "//div[@role='button'][contains(., 'Post')]"],
+                [By.XPATH, "//span[text()='Post']"]
+            ]},
+            {'op': 'click'},
+            {'op': 'wait_any',
+             'appear': [[By.CSS_SELECTOR, '[data-testid="toast"]']],
+             'gone': [[By.CSS_SELECTOR, selectors['tweet_input']]]}
+        ], timeout)
+
     def wait_for_element(self, 
                         element_identifier: str, 
                         by: str = By.CSS_SELECTOR, 
-                        timeout: int = 10) -> Optional[WebElement]:
-        """Enhanced element wait with JavaScript check"""
-        if not self.driver or not self.wait:
+                        timeout: int = 10) -> Optional['WebElement']:
+        """Wait for a visible element with a single JavaScript check per poll"""
+        if not self.driver:
             return None
             
-        try:
-            element = self.wait.until(
-                EC.presence_of_element_located((by, element_identifier))
-            )
-            
-            is_interactive = self.driver.execute_script("""
-                var element = arguments[0];
-                var rect = element.getBoundingClientRect();
-                return (
-                    rect.width > 0 &&
-                    rect.height > 0 &&
-                    !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length)
-                );
-            """, element)
-            
-            return element if is_interactive else None
-            
-        except TimeoutException:
+        result = self.wait_for_any([(by, element_identifier)], timeout=timeout, condition='visible')
+        if result is None:
             logger.log_error("Element Wait", f"Element not found or not interactive: {element_identifier}")
             return None
+        return result[1]
 
     def check_element_exists(self, 
                            element_identifier: str, 
@@ -329,21 +633,105 @@ class BrowserSetup:
         except NoSuchElementException:
             return False
 
-    def wait_and_refresh(self, timeout: int = 5) -> None:
-        """Enhanced page refresh with state check"""
-        if not self.driver or not self.wait:
+    def wait_and_refresh(self, timeout: int = 10) -> None:
+        """Reload the page and wait until the new document has finished loading"""
+        if not self.driver:
             return
             
         try:
-            time.sleep(timeout)
-            self.driver.execute_script("window.location.reload(true);")
-            self.wait.until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
+            # The marker disappears with the old document, so a stale readyState can't match
+            self.page_loads += 1
+            self.driver.execute_script("window.__refreshMarker = true; window.location.reload(true);")
+            self.waits.until(
+                'page_refresh',
+                lambda: self.driver.execute_script(
+                    "return window.__refreshMarker === undefined && document.readyState === 'complete';"
+                ),
+                initial=timeout
             )
-            time.sleep(2)
         except Exception as e:
             logger.log_error("Page Refresh", str(e))
 
+    def has_valid_session(self, timeout: int = 8) -> bool:
+        """Quick probe: load the home timeline and see whether Twitter keeps us there"""
+        if not self.driver:
+            return False
+            
+        try:
+            self.navigate(f'{config.TWITTER_BASE_URL}/home')
+        except WebDriverException as e:
+            logger.logger.info(f"Session probe could not load home: {type(e).__name__}")
+            return False
+            
+        result = self.wait_for_any(
+            [
+                (By.CSS_SELECTOR, '[data-testid="SideNav_NewTweet_Button"]'),
+                (By.CSS_SELECTOR, '[data-testid="AppTabBar_Profile_Link"]'),
+                ('url', '/login')
+            ],
+            timeout=timeout,
+            key='session_probe'
+        )
+        return result is not None and result[0][0] != 'url'
+
+    def save_cookies(self, path: Optional[str] = None) -> bool:
+        """Write the current Twitter cookies to the cookie jar"""
+        path = path or self.cookie_jar_path
+        if not self.driver or not path:
+            return False
+            
+        try:
+            cookies = self.driver.get_cookies()
+            # Session cookies grant account access; keep the jar private
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cookies, f)
+            logger.logger.info(f"Saved {len(cookies)} cookies to {path}")
+            return True
+        except (OSError, WebDriverException) as e:
+            logger.log_error("Cookie Save", str(e))
+            return False
+
+    def load_cookies(self, path: Optional[str] = None) -> bool:
+        """Restore cookies from the cookie jar into the current browser"""
+        path = path or self.cookie_jar_path
+        if not self.driver or not path or not os.path.exists(path):
+            return False
+            
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cookies: List[Dict[str, Any]] = json.load(f)
+            
+            # Cookies can only be set for the domain currently loaded
+            self.navigate(f'{config.TWITTER_BASE_URL}/robots.txt')
+            now = time.time()
+            restored = 0
+            for cookie in cookies:
+                if 'expiry' in cookie:
+                    if cookie['expiry'] < now:
+                        continue
+                    cookie['expiry'] = int(cookie['expiry'])
+                try:
+                    self.driver.add_cookie(cookie)
+                    restored += 1
+                except WebDriverException:
+                    continue
+            logger.logger.info(f"Restored {restored}/{len(cookies)} cookies from {path}")
+            return restored > 0
+        except (OSError, ValueError, WebDriverException) as e:
+            logger.log_error("Cookie Load", str(e))
+            return False
+
+    def restore_session(self) -> bool:
+        """Reuse the profile's session or the saved cookie jar instead of logging in"""
+        if self.has_valid_session():
+            logger.logger.info("Existing browser profile session is valid, skipping login")
+            return True
+        if self.load_cookies() and self.has_valid_session():
+            logger.logger.info("Session restored from cookie jar, skipping login")
+            return True
+        return False
+
     def clear_cookies(self) -> None:
         """Clear cookies using JavaScript"""
         if not self.driver:
@@ -363,6 +751,15 @@ class BrowserSetup:
         except Exception as e:
             logger.log_error("Cookie Clear", str(e))
 
+    def is_alive(self) -> bool:
+        """Health check: the driver answers a trivial script"""
+        if not self.driver:
+            return False
+        try:
+            return self.driver.execute_script("return document.readyState;") is not None
+        except WebDriverException:
+            return False
+
     def close_browser(self) -> None:
         """Enhanced browser cleanup"""
         try:
@@ -372,6 +769,78 @@ class BrowserSetup:
                 logger.logger.info("Browser closed successfully")
         except Exception as e:
             logger.log_error("Browser Cleanup", str(e))
+        finally:
+            self.driver = None
+            self.wait = None
+
+class BrowserPool:
+    """An active driver plus a pre-warmed, authenticated standby to fail over to"""
 
-# Create singleton instance
-browser = BrowserSetup()
+    def __init__(self, standby_enabled: bool = True) -> None:
+        self.active = BrowserSetup(config.CHROME_PROFILE_DIR, name='primary')
+        self.standby_enabled: bool = standby_enabled
+        standby_profile = f"{config.CHROME_PROFILE_DIR}_standby" if config.CHROME_PROFILE_DIR else ''
+        self._spare = BrowserSetup(standby_profile, name='standby')
+        # The spare is only ever touched from this thread until it is promoted
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser-standby')
+        self._standby: Optional[Future] = None
+
+    def _prepare_standby(self) -> bool:
+        """Start the spare driver and authenticate it from the active driver's cookie jar"""
+        try:
+            if not self._spare.is_alive() and not self._spare.initialize_driver():
+                return False
+            if self._spare.restore_session():
+                logger.logger.info(f"Standby browser '{self._spare.name}' is warm and authenticated")
+                return True
+            logger.log_error("Browser Standby", "Standby could not restore the Twitter session")
+        except Exception as e:
+            logger.log_error("Browser Standby", str(e))
+        self._spare.close_browser()
+        return False
+
+    def warm_standby(self) -> None:
+        """Start warming the standby in the background unless it is ready or in progress"""
+        if not self.standby_enabled:
+            return
+        if self._standby is not None and (not self._standby.done() or self._standby.result()):
+            return
+        self._standby = self._executor.submit(self._prepare_standby)
+
+    def standby_ready(self) -> bool:
+        if self._standby is None or not self._standby.done() or not self._standby.result():
+            return False
+        return self._spare.is_alive()
+
+    def failover(self) -> bool:
+        """Promote the standby to active; returns False if no standby is ready"""
+        if not self.standby_ready():
+            return False
+
+        retired = self.active
+        self.active, self._spare = self._spare, retired
+        self._standby = None
+        logger.logger.warning(f"Failed over from browser '{retired.name}' to '{self.active.name}'")
+
+        # Shut the old driver down off the critical path, then rebuild it as the next standby
+        self._executor.submit(retired.close_browser)
+        self.warm_standby()
+        return True
+
+    def ensure_healthy(self) -> bool:
+        """True if the active driver responds, failing over to the standby if it does not"""
+        if self.active.is_alive():
+            return True
+        logger.logger.warning(f"Active browser '{self.active.name}' failed its health check")
+        return self.failover()
+
+    def close(self) -> None:
+        """Close both drivers"""
+        self.active.close_browser()
+        self._executor.submit(self._spare.close_browser)
+        self._executor.shutdown(wait=True)
+
+# Create singleton instance; built on first use so importing this module stays cheap
+browser_pool: BrowserPool = LazySingleton(  # type: ignore[assignment]
+    lambda: BrowserPool(standby_enabled=config.BROWSER_STANDBY_ENABLED)
+)
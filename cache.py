@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Optional, Any, Callable, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+from utils.logger import logger
+from utils.market import MarketSnapshot
+
+@dataclass
+class CacheEntry:
+    key: str
+    data: Any
+    stored_at: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+    def revalidation_headers(self) -> Dict[str, str]:
+        """Conditional request headers for an expired entry"""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """Two-tier (in-memory LRU + JSON files on disk) cache for decoded API responses"""
+
+    def __init__(self, cache_dir: str, max_entries: int = 128) -> None:
+        self.cache_dir: str = cache_dir
+        self.max_entries: int = max_entries
+        self._memory: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Stable cache key for a URL and its query parameters"""
+        query = '&'.join(f"{k}={params[k]}" for k in sorted(params or {}))
+        return f"{url}?{query}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _remember(self, entry: CacheEntry) -> None:
+        """Insert into the memory tier, evicting the least recently used entry"""
+        with self._lock:
+            self._memory[entry.key] = entry
+            self._memory.move_to_end(entry.key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key, fresh or not, from memory or disk"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = CacheEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.log_error("Response Cache", f"Unreadable cache file for {key}: {str(e)}")
+            return None
+
+        self._remember(entry)
+        return entry
+
+    def put(self,
+            key: str,
+            data: Any,
+            ttl: float,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> CacheEntry:
+        """Store a response in both tiers"""
+        entry = CacheEntry(key, data, time.time(), ttl, etag, last_modified)
+        self._remember(entry)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(entry), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.log_error("Response Cache", f"Failed to write cache file: {str(e)}")
+        return entry
+
+    def touch(self, entry: CacheEntry) -> CacheEntry:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        return self.put(entry.key, entry.data, entry.ttl, entry.etag, entry.last_modified)
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+class AnalysisCache:
+    """LRU/TTL cache of Claude analyses keyed on a quantized market state"""
+
+    def __init__(self,
+                 ttl_seconds: float,
+                 max_entries: int,
+                 price_bucket_pct: float,
+                 change_bucket_pct: float,
+                 volatility_threshold: float,
+                 neighbor_tolerance: int = 0) -> None:
+        self.ttl_seconds: float = ttl_seconds
+        self.max_entries: int = max_entries
+        self.change_bucket_pct: float = change_bucket_pct
+        self.volatility_threshold: float = volatility_threshold
+        # How many buckets apart two states may be and still count as the same market
+        self.neighbor_tolerance: int = neighbor_tolerance
+        self._log_price_step: float = math.log1p(price_bucket_pct / 100)
+        self._entries: 'OrderedDict[Tuple[int, ...], Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def quantize(self, btc: MarketSnapshot, eth: MarketSnapshot) -> Tuple[int, ...]:
+        """Bucket prices on a log scale, 24h changes linearly, plus the volatility regime"""
+        btc_change = btc.change_24h or 0.0
+        eth_change = eth.change_24h or 0.0
+        volatile = max(abs(btc_change), abs(eth_change)) >= self.volatility_threshold
+        return (
+            math.floor(math.log(btc.price) / self._log_price_step),
+            math.floor(math.log(eth.price) / self._log_price_step),
+            math.floor(btc_change / self.change_bucket_pct),
+            math.floor(eth_change / self.change_bucket_pct),
+            int(volatile)
+        )
+
+    def _similar(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> bool:
+        # The regime is the last element and must always match exactly
+        if a[-1] != b[-1]:
+            return False
+        return all(abs(x - y) <= self.neighbor_tolerance for x, y in zip(a[:-1], b[:-1]))
+
+    def get(self, state: Tuple[int, ...]) -> Optional[str]:
+        """Return a still-valid analysis for this or a similar state"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, stored_at) in self._entries.items() if now - stored_at >= self.ttl_seconds]:
+                del self._entries[key]
+
+            if state in self._entries:
+                match = state
+            elif self.neighbor_tolerance > 0:
+                match = next((key for key in reversed(self._entries) if self._similar(state, key)), None)
+            else:
+                match = None
+
+            if match is None:
+                return None
+            self._entries.move_to_end(match)
+            return self._entries[match][0]
+
+    def put(self, state: Tuple[int, ...], analysis: str) -> None:
+        """Remember an analysis for a market state"""
+        with self._lock:
+            self._entries[state] = (analysis, time.time())
+            self._entries.move_to_end(state)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -25,6 +25,10 @@ packages=(
     "anthropic"
     "requests"
     "python-dotenv"
+    "numpy"
+    "aiohttp"
+    "psutil"
+    "brotli"
 )
 
 for package in "${packages[@]}"; do
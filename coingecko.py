@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, Callable, Tuple, Iterable, TYPE_CHECKING
+import asyncio
+import functools
+import json
+import os
+import time
+
+from utils.logger import logger
+from utils.cache import ResponseCache, CacheEntry, SingleFlight
+from utils.transport import build_session
+from utils.lazy import LazySingleton
+from utils.market import MARKET_ROW_FIELDS
+from config import config
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# /coins/markets fields that /simple/price can return: its response key and the flag requesting it
+SIMPLE_PRICE_FIELDS: Dict[str, Tuple[str, Optional[str]]] = {
+    'current_price': ('usd', None),
+    'price_change_percentage_24h': ('usd_24h_change', 'include_24hr_change'),
+    'total_volume': ('usd_24h_vol', 'include_24hr_vol'),
+    'market_cap': ('usd_market_cap', 'include_market_cap')
+}
+IDENTITY_FIELDS = ('id', 'symbol', 'name')
+
+def _market_row(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    # Drops the dozens of /coins/markets fields nothing reads before their dict is built
+    return {key: value for key, value in pairs if key in MARKET_ROW_FIELDS}
+
+# json object_pairs_hook per endpoint, applied while decoding (and so before caching)
+PARSE_HOOKS: Dict[str, Callable[[List[Tuple[str, Any]]], Dict[str, Any]]] = {
+    '/coins/markets': _market_row
+}
+
+class CoinGeckoClient:
+    """CoinGecko HTTP client with TTL caching, revalidation and request collapsing"""
+
+    def __init__(self, cache: Optional[ResponseCache] = None) -> None:
+        self.config = config
+        self.session = build_session(self.config.HTTP_TRANSPORT_CONFIG)
+        self.cache = cache or ResponseCache(
+            os.path.join(self.config.CACHE_DIR, 'coingecko'),
+            max_entries=self.config.COINGECKO_CACHE_SIZE
+        )
+        self._flight = SingleFlight()
+        self._async_flight: Dict[str, asyncio.Future] = {}
+        # id/symbol/name of the last /coins/markets ranking, in market cap order
+        self._universe: List[Dict[str, str]] = []
+        self._universe_at: float = 0.0
+
+    def _ttl(self, endpoint: str) -> float:
+        return self.config.COINGECKO_CACHE_TTL.get(endpoint, 0)
+
+    def _lookup(self, endpoint: str, params: Dict[str, Any]) -> Tuple[str, Optional[CacheEntry]]:
+        key = ResponseCache.make_key(self.config.COINGECKO_BASE_URL + endpoint, params)
+        return key, self.cache.get(key)
+
+    def _store(self, key: str, endpoint: str, data: Any, headers: Any) -> float:
+        """Cache a response; returns the fetch time later hits on it will report"""
+        ttl = self._ttl(endpoint)
+        if ttl > 0:
+            return self.cache.put(key, data, ttl, headers.get('ETag'), headers.get('Last-Modified')).stored_at
+        return time.time()
+
+    def get_json(self,
+                 endpoint: str,
+                 params: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[Tuple[float, float]] = None) -> Any:
+        """GET an endpoint (e.g. '/coins/markets'), served from cache while fresh
+
+        timeout defaults to the transport's (connect, read) timeouts.
+        Raises requests exceptions on failure, like Session.get().raise_for_status().
+        """
+        return self.get_timed_json(endpoint, params, timeout)[0]
+
+    def get_timed_json(self,
+                       endpoint: str,
+                       params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[Tuple[float, float]] = None) -> Tuple[Any, float]:
+        """(data, fetched_at) like get_json; fetched_at is when CoinGecko served the data
+
+        A cache hit, from either tier, keeps the time of the response it was stored from.
+        """
+        params = params or {}
+        key, entry = self._lookup(endpoint, params)
+        if entry is not None and entry.fresh:
+            logger.coingecko_logger.debug(f"Cache hit: {endpoint}")
+            return entry.data, entry.stored_at
+
+        return self._flight.do(key, lambda: self._fetch(key, endpoint, params, timeout))
+
+    def _fetch(self,
+               key: str,
+               endpoint: str,
+               params: Dict[str, Any],
+               timeout: Optional[Tuple[float, float]]) -> Tuple[Any, float]:
+        # Another caller may have refreshed the entry while we waited to lead
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            return entry.data, entry.stored_at
+
+        headers = entry.revalidation_headers() if entry is not None else {}
+        response = self.session.get(
+            self.config.COINGECKO_BASE_URL + endpoint,
+            params=params,
+            headers=headers,
+            timeout=timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            logger.coingecko_logger.debug(f"Not modified: {endpoint}")
+            # CoinGecko confirmed the data is still current
+            return entry.data, self.cache.touch(entry).stored_at
+
+        response.raise_for_status()
+        data = response.json(object_pairs_hook=PARSE_HOOKS.get(endpoint))
+        return data, self._store(key, endpoint, data, response.headers)
+
+    async def get_json_async(self,
+                             http: 'aiohttp.ClientSession',
+                             endpoint: str,
+                             params: Optional[Dict[str, Any]] = None) -> Any:
+        """Async counterpart of get_json using an aiohttp session"""
+        return (await self.get_timed_json_async(http, endpoint, params))[0]
+
+    async def get_timed_json_async(self,
+                                   http: 'aiohttp.ClientSession',
+                                   endpoint: str,
+                                   params: Optional[Dict[str, Any]] = None) -> Tuple[Any, float]:
+        """Async counterpart of get_timed_json"""
+        params = params or {}
+        key, entry = self._lookup(endpoint, params)
+        if entry is not None and entry.fresh:
+            return entry.data, entry.stored_at
+
+        pending = self._async_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_flight[key] = future
+        try:
+            result = await self._fetch_async(http, key, endpoint, params, entry)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not reported on GC
+            future.exception()
+            raise
+        finally:
+            del self._async_flight[key]
+
+    async def _fetch_async(self,
+                           http: 'aiohttp.ClientSession',
+                           key: str,
+                           endpoint: str,
+                           params: Dict[str, Any],
+                           entry: Optional[CacheEntry]) -> Tuple[Any, float]:
+        # aiohttp only accepts str/int/float query values
+        query = {k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()}
+        headers = entry.revalidation_headers() if entry is not None else {}
+
+        async with http.get(self.config.COINGECKO_BASE_URL + endpoint, params=query, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                return entry.data, self.cache.touch(entry).stored_at
+            response.raise_for_status()
+            data = await response.json(
+                content_type=None, loads=functools.partial(json.loads, object_pairs_hook=PARSE_HOOKS.get(endpoint))
+            )
+            return data, self._store(key, endpoint, data, response.headers)
+
+    def remember_universe(self, coins: List[Dict[str, Any]]) -> None:
+        """Keep the ranking of a /coins/markets fetch so later fetches can use /simple/price"""
+        self._universe = [{field: coin[field] for field in IDENTITY_FIELDS} for coin in coins]
+        self._universe_at = time.monotonic()
+
+    def universe_fresh(self) -> bool:
+        return bool(self._universe) and time.monotonic() - self._universe_at < self.config.COINGECKO_UNIVERSE_TTL
+
+    def choose_markets_endpoint(self, fields: Iterable[str]) -> str:
+        """'/simple/price' when it can supply every field for a fresh ranking, else '/coins/markets'"""
+        if self.universe_fresh() and all(
+            field in SIMPLE_PRICE_FIELDS or field in IDENTITY_FIELDS for field in fields
+        ):
+            return '/simple/price'
+        return '/coins/markets'
+
+    def simple_price_params(self, fields: Iterable[str], ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """/simple/price query requesting only the given fields"""
+        params = {
+            'ids': ','.join(ids if ids is not None else (coin['id'] for coin in self._universe)),
+            'vs_currencies': 'usd'
+        }
+        for field in fields:
+            flag = SIMPLE_PRICE_FIELDS.get(field, (None, None))[1]
+            if flag:
+                params[flag] = 'true'
+        return params
+
+    def markets_from_simple_price(self, data: Dict[str, Any], fields: Iterable[str]) -> List[Dict[str, Any]]:
+        """Rebuild /coins/markets-shaped coins, in ranking order, from a /simple/price response"""
+        wanted = [(field, SIMPLE_PRICE_FIELDS[field][0]) for field in fields if field in SIMPLE_PRICE_FIELDS]
+        coins: List[Dict[str, Any]] = []
+        for identity in self._universe:
+            prices = data.get(identity['id'])
+            if not prices or prices.get('usd') is None:
+                continue
+            coin: Dict[str, Any] = dict(identity)
+            for field, key in wanted:
+                coin[field] = prices.get(key)
+            coins.append(coin)
+        return coins
+
+# Create singleton instance
+coingecko_client: CoinGeckoClient = LazySingleton(CoinGeckoClient)  # type: ignore[assignment]
@@ -2,10 +2,11 @@
 # -*- coding: utf-8 -*-
 
 from dataclasses import dataclass
-from typing import Dict, List, TypedDict, Optional
+from typing import ClassVar, Dict, List, TypedDict, Optional
 import os
 from dotenv import load_dotenv
 from utils.logger import logger
+from utils.lazy import LazySingleton
 
 class CryptoInfo(TypedDict):
     id: str
@@ -18,6 +19,58 @@ class MarketAnalysisConfig(TypedDict):
     volume_significance: int
     historical_periods: List[int]
 
+class AnalysisCacheConfig(TypedDict):
+    enabled: bool
+    ttl_minutes: int
+    max_entries: int
+    price_bucket_pct: float
+    change_bucket_pct: float
+    neighbor_tolerance: int
+
+class BrowserWatchdogConfig(TypedDict):
+    enabled: bool
+    max_rss_mb: float
+    max_cpu_percent: float
+    cpu_breaches: int
+    max_page_loads: int
+
+class SchedulerConfig(TypedDict):
+    align_to_interval: bool
+    poll_seconds: int
+    missed_run_policy: str
+    misfire_grace_seconds: int
+    min_trigger_gap_seconds: int
+    error_backoff_seconds: int
+    max_error_backoff_seconds: int
+
+class ServiceLimits(TypedDict):
+    rate_per_minute: float
+    burst: int
+    failure_threshold: int
+    reset_timeout: float
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    max_wait: float
+
+class HttpTransportConfig(TypedDict):
+    pool_connections: int
+    pool_maxsize: int
+    connect_timeout: float
+    read_timeout: float
+    connect_retries: int
+    keepalive_seconds: float
+
+class PriceSourceConfig(TypedDict):
+    sources: List[str]
+    hedge_enabled: bool
+    hedge_quantile: float
+    initial_hedge_delay: float
+    min_hedge_delay: float
+    max_hedge_delay: float
+    latency_window: int
+    min_samples: int
+
 class TweetConstraints(TypedDict):
     MIN_LENGTH: int
     MAX_LENGTH: int
@@ -25,7 +78,6 @@ class TweetConstraints(TypedDict):
 
 class CoinGeckoParams(TypedDict):
     vs_currency: str
-    ids: str
     order: str
     per_page: int
     page: int
@@ -43,6 +95,10 @@ class Config:
         load_dotenv(env_path)
         logger.logger.info("Environment variables loaded")
         
+        # Logging Output ('text' or 'json' lines)
+        self.LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'text').lower()
+        logger.set_json_format(self.LOG_FORMAT == 'json')
+        
         # Debug loaded variables
         logger.logger.info(f"CHROME_DRIVER_PATH: {os.getenv('CHROME_DRIVER_PATH')}")
         logger.logger.info(f"CLAUDE_API_KEY Present: {bool(os.getenv('CLAUDE_API_KEY'))}")
@@ -50,16 +106,110 @@ class Config:
         # Claude API Configuration
         self.CLAUDE_API_KEY: str = os.getenv('CLAUDE_API_KEY', '')
         self.CLAUDE_MODEL: str = 'claude-3-haiku-20240307'
+        # Optional override, e.g. a local stub server for tests and backfills
+        self.CLAUDE_BASE_URL: Optional[str] = os.getenv('CLAUDE_BASE_URL') or None
         
         # Twitter Configuration
         self.TWITTER_USERNAME: str = os.getenv('TWITTER_USERNAME', '')
         self.TWITTER_PASSWORD: str = os.getenv('TWITTER_PASSWORD', '')
         self.CHROME_DRIVER_PATH: str = os.getenv('CHROME_DRIVER_PATH', '/usr/local/bin/chromedriver')
+        # Overridable so the benchmark can point the browser at local stand-in pages
+        self.TWITTER_BASE_URL: str = os.getenv('TWITTER_BASE_URL', 'https://twitter.com').rstrip('/')
+        
+        # Browser Session Persistence (empty value disables)
+        self.CHROME_PROFILE_DIR: str = os.getenv('CHROME_PROFILE_DIR', 'browser_profile')
+        self.COOKIE_JAR_PATH: str = os.getenv('COOKIE_JAR_PATH', 'twitter_cookies.json')
+        
+        # Warm Standby Browser (second authenticated Chrome for instant failover)
+        self.BROWSER_STANDBY_ENABLED: bool = os.getenv('BROWSER_STANDBY_ENABLED', 'true').lower() == 'true'
+        
+        # Lean Browser Profile (headless, heavy resources blocked via DevTools)
+        self.BROWSER_LEAN_MODE: bool = os.getenv('BROWSER_LEAN_MODE', 'false').lower() == 'true'
+        self.BROWSER_RENDERER_PROCESS_LIMIT: int = int(os.getenv('BROWSER_RENDERER_PROCESS_LIMIT', '2'))
+        self.BROWSER_BLOCKED_URLS: List[str] = [
+            # Images, video and fonts
+            '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.mp4', '*.m3u8', '*.woff', '*.woff2', '*.ttf',
+            '*pbs.twimg.com*', '*video.twimg.com*',
+            # Third-party trackers and ads
+            '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+            '*ads-twitter.com*', '*ads-api.twitter.com*', '*analytics.twitter.com*',
+            # Client telemetry
+            '*/i/jot*', '*/1.1/jot/*'
+        ]
+        
+        # Chrome Resource Watchdog (checked between cycles; breaching a limit recycles the driver)
+        self.BROWSER_WATCHDOG_CONFIG: BrowserWatchdogConfig = {
+            'enabled': os.getenv('BROWSER_WATCHDOG_ENABLED', 'true').lower() == 'true',
+            'max_rss_mb': float(os.getenv('BROWSER_MAX_RSS_MB', '1500')),
+            'max_cpu_percent': float(os.getenv('BROWSER_MAX_CPU_PERCENT', '90')),
+            'cpu_breaches': 3,
+            'max_page_loads': int(os.getenv('BROWSER_MAX_PAGE_LOADS', '200'))
+        }
+        
+        # Metrics (Prometheus text format; port 0 / empty path disables that exporter)
+        self.METRICS_PORT: int = int(os.getenv('METRICS_PORT', '0'))
+        self.METRICS_HOST: str = os.getenv('METRICS_HOST', '127.0.0.1')
+        self.METRICS_TEXTFILE_PATH: str = os.getenv('METRICS_TEXTFILE_PATH', '')
+        
+        # Tracing (per-cycle spans as JSON lines; disabled by default)
+        self.TRACING_ENABLED: bool = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+        self.TRACE_FILE_PATH: str = os.getenv('TRACE_FILE_PATH', 'logs/traces.jsonl')
+        self.TRACE_FILE_MAX_BYTES: int = 10 * 1024 * 1024
         
         # Correlation Analysis Configuration
         self.CORRELATION_INTERVAL: int = 30  # minutes
+        
+        # Cycle Scheduling (cheap BTC/ETH price polls between full cycles; a move past
+        # MARKET_ANALYSIS_CONFIG['volatility_threshold'] percent runs a cycle early)
+        self.SCHEDULER_CONFIG: SchedulerConfig = {
+            'align_to_interval': os.getenv('SCHEDULER_ALIGN', 'true').lower() == 'true',
+            'poll_seconds': int(os.getenv('SCHEDULER_POLL_SECONDS', '60')),
+            'missed_run_policy': os.getenv('SCHEDULER_MISSED_RUN_POLICY', 'run_once'),
+            'misfire_grace_seconds': 60,
+            'min_trigger_gap_seconds': 300,
+            'error_backoff_seconds': 30,
+            'max_error_backoff_seconds': 300
+        }
         self.MAX_RETRIES: int = int(os.getenv('MAX_RETRIES', '3'))
         
+        # Client Resilience (per-service token bucket, circuit breaker and jittered backoff;
+        # max_wait bounds the total time one call may spend waiting on limits and retries)
+        self.SERVICE_LIMITS: Dict[str, ServiceLimits] = {
+            'coingecko': {
+                'rate_per_minute': float(os.getenv('COINGECKO_RATE_PER_MINUTE', '25')),
+                'burst': 5,
+                'failure_threshold': 5,
+                'reset_timeout': 60,
+                'max_attempts': self.MAX_RETRIES,
+                'base_delay': 2,
+                'max_delay': 20,
+                'max_wait': 45
+            },
+            'coincap': {
+                'rate_per_minute': float(os.getenv('COINCAP_RATE_PER_MINUTE', '60')),
+                'burst': 5,
+                'failure_threshold': 5,
+                'reset_timeout': 60,
+                'max_attempts': 2,
+                'base_delay': 1,
+                'max_delay': 10,
+                'max_wait': 30
+            },
+            'claude': {
+                'rate_per_minute': float(os.getenv('CLAUDE_RATE_PER_MINUTE', '30')),
+                'burst': 3,
+                'failure_threshold': 4,
+                'reset_timeout': 120,
+                'max_attempts': self.MAX_RETRIES,
+                'base_delay': 2,
+                'max_delay': 30,
+                'max_wait': 60
+            }
+        }
+        
+        # Market Data Storage
+        self.DATABASE_PATH: str = os.getenv('DATABASE_PATH', 'market_data.db')
+        
         # ETH/BTC Market Analysis Parameters
         self.MARKET_ANALYSIS_CONFIG: MarketAnalysisConfig = {
             'correlation_sensitivity': 0.7,
@@ -68,6 +218,16 @@ class Config:
             'historical_periods': [1, 4, 24]
         }
         
+        # Claude Analysis Reuse (skip the API call while the market stays in the same bucket)
+        self.ANALYSIS_CACHE_CONFIG: AnalysisCacheConfig = {
+            'enabled': os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true',
+            'ttl_minutes': 120,
+            'max_entries': 32,
+            'price_bucket_pct': 0.5,
+            'change_bucket_pct': 1.0,
+            'neighbor_tolerance': 0
+        }
+        
         # Tweet Length Constraints
         self.TWEET_CONSTRAINTS: TweetConstraints = {
             'MIN_LENGTH': 220,
@@ -76,20 +236,71 @@ class Config:
         }
         
         # API Endpoints
-        self.COINGECKO_BASE_URL: str = "https://api.coingecko.com/api/v3"
+        self.COINGECKO_BASE_URL: str = os.getenv('COINGECKO_BASE_URL', "https://api.coingecko.com/api/v3")
+        self.COINCAP_BASE_URL: str = os.getenv('COINCAP_BASE_URL', "https://rest.coincap.io/v3")
+        self.COINCAP_API_KEY: str = os.getenv('COINCAP_API_KEY', '')
+        
+        # Market Data Providers, in priority order. A request still running past the current
+        # provider's p95 latency is hedged to the next one and the first valid answer wins
+        self.PRICE_SOURCE_CONFIG: PriceSourceConfig = {
+            'sources': [
+                name.strip() for name in os.getenv('PRICE_SOURCES', 'coingecko,coincap').split(',') if name.strip()
+            ],
+            'hedge_enabled': os.getenv('PRICE_HEDGE_ENABLED', 'true').lower() == 'true',
+            'hedge_quantile': 0.95,
+            'initial_hedge_delay': float(os.getenv('PRICE_HEDGE_INITIAL_DELAY', '5')),
+            'min_hedge_delay': 0.25,
+            'max_hedge_delay': float(os.getenv('PRICE_HEDGE_MAX_DELAY', '10')),
+            'latency_window': 200,
+            'min_samples': 20
+        }
+        
+        # Number of assets tracked, ranked by market cap
+        self.TRACKED_ASSET_COUNT: int = int(os.getenv('TRACKED_ASSET_COUNT', '100'))
+        self.COINGECKO_MAX_PER_PAGE: int = 250
         
         # CoinGecko API Request Settings
         self.COINGECKO_PARAMS: CoinGeckoParams = {
             "vs_currency": "usd",
-            "ids": "bitcoin,ethereum",
             "order": "market_cap_desc",
-            "per_page": 2,
+            "per_page": self.COINGECKO_MAX_PER_PAGE,
             "page": 1,
             "sparkline": False,
             "price_change_percentage": "1h,24h,7d"
         }
         
-        # Tracked Cryptocurrencies
+        # HTTP Transport (pooled keep-alive sessions with gzip/brotli and default timeouts)
+        self.HTTP_TRANSPORT_CONFIG: HttpTransportConfig = {
+            'pool_connections': 4,
+            'pool_maxsize': 8,
+            'connect_timeout': float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+            'read_timeout': float(os.getenv('HTTP_READ_TIMEOUT', '30')),
+            'connect_retries': 2,
+            'keepalive_seconds': 60
+        }
+        
+        # Coin fields every cycle needs; when /simple/price can supply all of them it replaces
+        # the much larger /coins/markets response, using the ids of the last ranking fetched.
+        # It has no 1h/7d changes, so the default (which stores them) always uses /coins/markets
+        self.MARKET_DATA_FIELDS: List[str] = [
+            field.strip() for field in os.getenv(
+                'MARKET_DATA_FIELDS',
+                'current_price,price_change_percentage_1h_in_currency,price_change_percentage_24h,'
+                'price_change_percentage_7d_in_currency,total_volume,market_cap'
+            ).split(',') if field.strip()
+        ]
+        # Seconds a /coins/markets ranking (its ids and order) is reused by /simple/price fetches
+        self.COINGECKO_UNIVERSE_TTL: int = int(os.getenv('COINGECKO_UNIVERSE_TTL', '3600'))
+        
+        # CoinGecko Response Cache (TTL in seconds per endpoint)
+        self.CACHE_DIR: str = os.getenv('CACHE_DIR', '.cache')
+        self.COINGECKO_CACHE_SIZE: int = 128
+        self.COINGECKO_CACHE_TTL: Dict[str, int] = {
+            '/coins/markets': 60,
+            '/simple/price': 30
+        }
+        
+        # Core Cryptocurrencies (always expected in every fetch)
         self.TRACKED_CRYPTO: Dict[str, CryptoInfo] = {
             'bitcoin': {
                 'id': 'bitcoin',
@@ -108,36 +319,40 @@ class Config:
 
 Bitcoin:
 - Price: ${btc_price:,.2f}
-- 24h Change: {btc_change:.2f}%
-- Volume: ${btc_volume:,.0f}
+- 24h Change: {btc_change}
+- Volume: {btc_volume}
 
 Ethereum:
 - Price: ${eth_price:,.2f}
-- 24h Change: {eth_change:.2f}%
-- Volume: ${eth_volume:,.0f}
+- 24h Change: {eth_change}
+- Volume: {eth_volume}
+
+Rolling ETH/BTC Correlation:
+{correlation_summary}
+
+Notable Market Correlations:
+{notable_pairs}
 
 Key Analysis Points:
 1. Price correlation
 2. Market sentiment
 3. Short-term outlook
 4. Trading signals"""
-        
-        # Validation
-        self._validate_config()
 
-    def _validate_config(self) -> None:
-        """Validate required configuration settings"""
-        required_settings: List[tuple[str, str]] = [
-            ('TWITTER_USERNAME', self.TWITTER_USERNAME),
-            ('TWITTER_PASSWORD', self.TWITTER_PASSWORD),
-            ('CHROME_DRIVER_PATH', self.CHROME_DRIVER_PATH),
-            ('CLAUDE_API_KEY', self.CLAUDE_API_KEY)
-        ]
-        
+    # Settings each component cannot run without; validated only when that component starts
+    REQUIRED_SETTINGS: ClassVar[Dict[str, List[str]]] = {
+        'twitter': ['TWITTER_USERNAME', 'TWITTER_PASSWORD'],
+        'claude': ['CLAUDE_API_KEY']
+    }
+
+    def validate(self, *components: str) -> None:
+        """Raise ValueError if a setting required by any of the given components is missing"""
         missing_settings: List[str] = []
-        for setting_name, setting_value in required_settings:
-            if not setting_value or setting_value.strip() == '':
-                missing_settings.append(setting_name)
+        for component in components or tuple(self.REQUIRED_SETTINGS):
+            for setting_name in self.REQUIRED_SETTINGS[component]:
+                setting_value = getattr(self, setting_name)
+                if (not setting_value or setting_value.strip() == '') and setting_name not in missing_settings:
+                    missing_settings.append(setting_name)
         
         if missing_settings:
             error_msg = f"Missing required configuration: {', '.join(missing_settings)}"
@@ -154,6 +369,19 @@ Key Analysis Points:
         params.update(kwargs)
         return params
 
+    def get_coingecko_page_params(self) -> List[Dict]:
+        """Parameters for the fewest /coins/markets pages covering TRACKED_ASSET_COUNT
+
+        Pages are sized evenly so they overshoot the count by less than one row per page;
+        callers trim the combined rows to TRACKED_ASSET_COUNT.
+        """
+        pages = -(-self.TRACKED_ASSET_COUNT // self.COINGECKO_MAX_PER_PAGE)
+        per_page = -(-self.TRACKED_ASSET_COUNT // pages)
+        return [
+            self.get_coingecko_params(per_page=per_page, page=page)
+            for page in range(1, pages + 1)
+        ]
+
     @property
     def twitter_selectors(self) -> Dict[str, str]:
         """CSS Selectors for Twitter elements"""
@@ -165,5 +393,5 @@ Key Analysis Points:
             'tweet_button': '[data-testid="tweetButton"]'
         }
 
-# Create singleton instance
-config = Config()
+# Create singleton instance; .env is read on first attribute access, not at import
+config: Config = LazySingleton(Config)  # type: ignore[assignment]
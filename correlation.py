@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
+import math
+import time
+import numpy as np
+
+from utils.logger import logger
+
+@dataclass
+class CorrelationStats:
+    period_hours: int
+    samples: int
+    correlation: Optional[float]
+    beta: Optional[float]
+    covariance: Optional[float]
+    ratio_change: float  # % change of ETH/BTC over the window
+
+class RollingCorrelation:
+    """Time-windowed Pearson correlation maintained with streaming sums"""
+
+    MIN_SAMPLES: int = 3
+    # Recompute the sums from the window every so often to cancel float drift
+    RESYNC_INTERVAL: int = 1000
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds: float = window_seconds
+        self._samples: deque = deque()
+        self._n = 0
+        self._sum_x = self._sum_y = 0.0
+        self._sum_xx = self._sum_yy = self._sum_xy = 0.0
+        self._updates = 0
+
+    def _add(self, x: float, y: float, sign: int) -> None:
+        self._n += sign
+        self._sum_x += sign * x
+        self._sum_y += sign * y
+        self._sum_xx += sign * x * x
+        self._sum_yy += sign * y * y
+        self._sum_xy += sign * x * y
+
+    def _resync(self) -> None:
+        """Rebuild the running sums from the samples currently in the window"""
+        self._n = 0
+        self._sum_x = self._sum_y = 0.0
+        self._sum_xx = self._sum_yy = self._sum_xy = 0.0
+        for _, x, y in self._samples:
+            self._add(x, y, 1)
+
+    def update(self, timestamp: float, x: float, y: float) -> None:
+        """Add one (x, y) return pair and evict samples older than the window"""
+        self._samples.append((timestamp, x, y))
+        self._add(x, y, 1)
+
+        cutoff = timestamp - self.window_seconds
+        while self._samples and self._samples[0][0] <= cutoff:
+            _, old_x, old_y = self._samples.popleft()
+            self._add(old_x, old_y, -1)
+        if not self._samples:
+            self._resync()
+
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0:
+            self._resync()
+
+    @property
+    def samples(self) -> int:
+        return self._n
+
+    def covariance(self) -> Optional[float]:
+        """Sample covariance of x and y"""
+        if self._n < 2:
+            return None
+        return (self._sum_xy - self._sum_x * self._sum_y / self._n) / (self._n - 1)
+
+    def _variance(self, sum_sq: float, total: float) -> float:
+        return max((sum_sq - total * total / self._n) / (self._n - 1), 0.0)
+
+    def correlation(self) -> Optional[float]:
+        """Pearson correlation of x and y"""
+        if self._n < self.MIN_SAMPLES:
+            return None
+        var_x = self._variance(self._sum_xx, self._sum_x)
+        var_y = self._variance(self._sum_yy, self._sum_y)
+        if var_x == 0.0 or var_y == 0.0:
+            return None
+        r = self.covariance() / math.sqrt(var_x * var_y)
+        return max(-1.0, min(1.0, r))
+
+    def beta(self) -> Optional[float]:
+        """Regression slope of y on x"""
+        if self._n < self.MIN_SAMPLES:
+            return None
+        var_x = self._variance(self._sum_xx, self._sum_x)
+        if var_x == 0.0:
+            return None
+        return self.covariance() / var_x
+
+    def ratio_change(self) -> float:
+        """% change of y relative to x over the window, from summed log returns"""
+        return (math.exp(self._sum_y - self._sum_x) - 1) * 100
+
+class CorrelationEngine:
+    """Rolling ETH/BTC correlation for every configured historical period"""
+
+    def __init__(self, periods_hours: List[int], sensitivity: float) -> None:
+        self.sensitivity: float = sensitivity
+        self.windows: Dict[int, RollingCorrelation] = {
+            hours: RollingCorrelation(hours * 3600) for hours in sorted(periods_hours)
+        }
+        self._last_prices: Optional[Tuple[float, float]] = None
+        self._last_timestamp: Optional[float] = None
+
+    def update(self, btc_price: float, eth_price: float, timestamp: Optional[float] = None) -> bool:
+        """Feed one price tick; O(1) amortized per window. False if it was not newer than the last"""
+        ts = timestamp if timestamp is not None else time.time()
+        if btc_price <= 0 or eth_price <= 0:
+            return False
+        if self._last_timestamp is not None and ts <= self._last_timestamp:
+            return False
+
+        if self._last_prices is not None:
+            btc_return = math.log(btc_price / self._last_prices[0])
+            eth_return = math.log(eth_price / self._last_prices[1])
+            for window in self.windows.values():
+                window.update(ts, btc_return, eth_return)
+
+        self._last_prices = (btc_price, eth_price)
+        self._last_timestamp = ts
+        return True
+
+    def warm_start(self, timestamps: np.ndarray, btc_prices: np.ndarray, eth_prices: np.ndarray) -> None:
+        """Replay aligned historical prices, e.g. from the market data store"""
+        for ts, btc_price, eth_price in zip(timestamps, btc_prices, eth_prices):
+            if not (np.isfinite(btc_price) and np.isfinite(eth_price)):
+                continue
+            self.update(float(btc_price), float(eth_price), float(ts))
+        logger.logger.info(f"Correlation engine warmed with {len(timestamps)} historical ticks")
+
+    def snapshot(self) -> List[CorrelationStats]:
+        """Current statistics for every window, shortest first"""
+        return [
+            CorrelationStats(
+                period_hours=hours,
+                samples=window.samples,
+                correlation=window.correlation(),
+                beta=window.beta(),
+                covariance=window.covariance(),
+                ratio_change=window.ratio_change()
+            )
+            for hours, window in self.windows.items()
+        ]
+
+    def describe(self, stats: CorrelationStats) -> str:
+        """Human readable strength label based on correlation_sensitivity"""
+        if stats.correlation is None:
+            return "insufficient data"
+        strength = "strong" if abs(stats.correlation) >= self.sensitivity else "weak"
+        direction = "positive" if stats.correlation >= 0 else "negative"
+        return f"{strength} {direction}"
+
+    def summary(self) -> str:
+        """Prompt-ready summary of all windows"""
+        lines = []
+        for stats in self.snapshot():
+            if stats.correlation is None:
+                lines.append(f"- {stats.period_hours}h: insufficient data ({stats.samples} samples)")
+                continue
+            lines.append(
+                f"- {stats.period_hours}h: r={stats.correlation:.2f} ({self.describe(stats)}), "
+                f"beta={stats.beta:.2f}, ETH/BTC {stats.ratio_change:+.2f}%"
+            )
+        return "\n".join(lines)
+
+class CorrelationMatrix:
+    """Pairwise return correlation across many assets, computed in one pass"""
+
+    MIN_SAMPLES: int = 3
+    # Pairs above this are pegs or wrapped tokens (WBTC/BTC, STETH/ETH), not signals
+    PEG_THRESHOLD: float = 0.98
+
+    def __init__(self, symbols: List[str], matrix: np.ndarray, samples: int) -> None:
+        self.symbols: List[str] = symbols
+        self.matrix: np.ndarray = matrix
+        self.samples: int = samples
+        self._index: Dict[str, int] = {symbol: i for i, symbol in enumerate(symbols)}
+
+    @classmethod
+    def from_prices(cls, prices: np.ndarray, symbols: List[str]) -> 'CorrelationMatrix':
+        """Build from a (time, asset) price matrix; assets with gaps or flat prices are dropped"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(prices), axis=0)
+        if len(returns) < cls.MIN_SAMPLES:
+            return cls([], np.empty((0, 0)), len(returns))
+
+        usable = np.isfinite(returns).all(axis=0)
+        returns = returns[:, usable]
+        centered = returns - returns.mean(axis=0)
+        norms = np.sqrt((centered * centered).sum(axis=0))
+        varying = norms > 0
+        usable[usable] = varying
+
+        kept = [symbol for symbol, ok in zip(symbols, usable) if ok]
+        if not kept:
+            return cls([], np.empty((0, 0)), len(returns))
+
+        z = centered[:, varying] / norms[varying]
+        matrix = np.clip(z.T @ z, -1.0, 1.0)
+        return cls(kept, matrix, len(returns))
+
+    def get(self, a: str, b: str) -> Optional[float]:
+        """Correlation between two symbols, if both are in the matrix"""
+        i, j = self._index.get(a.upper()), self._index.get(b.upper())
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    def _pairs(self, scores: np.ndarray, top_n: int, mask: np.ndarray) -> List[Tuple[str, str, float]]:
+        upper_i, upper_j = np.triu_indices(len(self.symbols), k=1)
+        candidates = np.flatnonzero(mask[upper_i, upper_j])
+        if not len(candidates):
+            return []
+        pair_scores = scores[upper_i[candidates], upper_j[candidates]]
+        top_n = min(top_n, len(candidates))
+        best = np.argpartition(-pair_scores, top_n - 1)[:top_n]
+        best = best[np.argsort(-pair_scores[best])]
+        return [
+            (self.symbols[upper_i[candidates[k]]],
+             self.symbols[upper_j[candidates[k]]],
+             float(self.matrix[upper_i[candidates[k]], upper_j[candidates[k]]]))
+            for k in best
+        ]
+
+    def strongest_pairs(self, top_n: int = 10) -> List[Tuple[str, str, float]]:
+        """Pairs with the highest absolute correlation, excluding pegs"""
+        if not self.symbols:
+            return []
+        strength = np.abs(self.matrix)
+        return self._pairs(strength, top_n, strength < self.PEG_THRESHOLD)
+
+    def shifted_pairs(self, baseline: 'CorrelationMatrix', top_n: int = 10) -> List[Tuple[str, str, float, float]]:
+        """Pairs whose correlation moved most relative to a baseline (e.g. a longer window)"""
+        common = [symbol for symbol in self.symbols if symbol in baseline._index]
+        if len(common) < 2:
+            return []
+        ours = np.array([self._index[s] for s in common])
+        theirs = np.array([baseline._index[s] for s in common])
+        current = self.matrix[np.ix_(ours, ours)]
+        previous = baseline.matrix[np.ix_(theirs, theirs)]
+
+        shifted = CorrelationMatrix(common, current, self.samples)
+        mask = np.abs(previous) < self.PEG_THRESHOLD
+        pairs = shifted._pairs(np.abs(current - previous), top_n, mask)
+        return [(a, b, r, baseline.get(a, b)) for a, b, r in pairs]
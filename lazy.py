@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable
+import threading
+
+class LazySingleton:
+    """Module-level singleton that is only constructed on first attribute access
+
+    Importing a module that defines one costs nothing; `from config import config`
+    keeps working unchanged because the proxy forwards attribute reads and writes.
+    """
+
+    __slots__ = ('_lazy_factory', '_lazy_instance', '_lazy_lock')
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_instance', None)
+        # Re-entrant: a factory may log, and the logger may itself be lazy
+        object.__setattr__(self, '_lazy_lock', threading.RLock())
+
+    def _lazy_resolve(self) -> Any:
+        instance = self._lazy_instance
+        if instance is None:
+            with self._lazy_lock:
+                if self._lazy_instance is None:
+                    object.__setattr__(self, '_lazy_instance', self._lazy_factory())
+                instance = self._lazy_instance
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lazy_resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._lazy_resolve(), name, value)
+
+    def __repr__(self) -> str:
+        if self._lazy_instance is None:
+            return f"<LazySingleton {getattr(self._lazy_factory, '__name__', 'factory')} (not built)>"
+        return repr(self._lazy_instance)
+
+def is_built(proxy: Any) -> bool:
+    """Whether a LazySingleton has constructed its instance yet"""
+    return not isinstance(proxy, LazySingleton) or proxy._lazy_instance is not None
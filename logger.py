@@ -1,11 +1,49 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from typing import Optional, Union
+from typing import List, Optional, Union
 import os
+import json
+import atexit
 import logging
+import queue
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+from utils.lazy import LazySingleton
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, for log shippers"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is; message merging and formatting happen on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class _ChannelFilter(logging.Filter):
+    """Keep records of dedicated channels (e.g. traces) out of the shared handlers"""
+
+    def __init__(self, excluded: List[str]) -> None:
+        super().__init__()
+        self.excluded = excluded
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name not in self.excluded
 
 class CorrelationLogger:  # Changed from object (not needed in Python 3)
     def __init__(self) -> None:
@@ -13,9 +51,16 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
         if not os.path.exists('logs'):
             os.makedirs('logs')
 
+        # Callers only enqueue; one background thread does all formatting and file I/O
+        self._queue: queue.Queue = queue.Queue(-1)
+        self._channels: List[str] = []
+        self._handlers: List[logging.Handler] = []
+        self._json_format = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+
         # Setup main logger
         self.logger: logging.Logger = logging.getLogger('ETHBTCCorrelation')
         self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(_DeferredQueueHandler(self._queue))
 
         # File handler with rotation (10MB max, keeping 5 backup files)
         file_handler = RotatingFileHandler(
@@ -28,21 +73,31 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
         # Console handler
         console_handler = logging.StreamHandler()
 
-        # Formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        channel_filter = _ChannelFilter(self._channels)
+        for handler in (file_handler, console_handler):
+            handler.addFilter(channel_filter)
+            self._add_handler(handler)
 
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self._listener = QueueListener(self._queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+        self._stopped = False
+        atexit.register(self.stop)
 
         # API specific loggers
         self.coingecko_logger: logging.Logger = self._setup_api_logger('coingecko')
         self.claude_logger: logging.Logger = self._setup_api_logger('claude')
 
+    def _formatter(self, fmt: str = TEXT_FORMAT) -> logging.Formatter:
+        return JsonFormatter() if self._json_format else logging.Formatter(fmt)
+
+    def _add_handler(self, handler: logging.Handler, fmt: str = TEXT_FORMAT) -> None:
+        handler.setFormatter(self._formatter(fmt))
+        # Remember the text format so set_json_format can switch back and forth
+        handler.text_format = fmt  # type: ignore[attr-defined]
+        self._handlers.append(handler)
+        if hasattr(self, '_listener'):
+            self._listener.handlers = tuple(self._handlers)
+
     def _setup_api_logger(self, api_name: str) -> logging.Logger:
         """Setup specific logger for each API with its own file"""
         logger = logging.getLogger(f'ETHBTCCorrelation.{api_name}')
@@ -55,21 +110,44 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
             backupCount=3,
             encoding='utf-8'
         )
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # Records reach the queue by propagating to the main logger
+        handler.addFilter(logging.Filter(logger.name))
+        self._add_handler(handler)
         return logger
 
+    def add_channel(self, name: str, handler: logging.Handler, fmt: str = '%(message)s') -> logging.Logger:
+        """Non-propagating logger whose records go only to handler, via the shared queue"""
+        channel = logging.getLogger(name)
+        channel.setLevel(logging.INFO)
+        channel.propagate = False
+        channel.addHandler(_DeferredQueueHandler(self._queue))
+        self._channels.append(name)
+        handler.addFilter(logging.Filter(name))
+        handler.setFormatter(logging.Formatter(fmt))
+        self._handlers.append(handler)
+        self._listener.handlers = tuple(self._handlers)
+        return channel
+
+    def set_json_format(self, enabled: bool) -> None:
+        """Switch the main and API log files and console between text and JSON lines"""
+        self._json_format = enabled
+        for handler in self._handlers:
+            text_format = getattr(handler, 'text_format', None)
+            if text_format is not None:
+                handler.setFormatter(self._formatter(text_format))
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread"""
+        if not self._stopped:
+            self._stopped = True
+            self._listener.stop()
+
     def log_coingecko_request(self, endpoint: str, success: bool = True) -> None:
         """Log Coingecko API interactions"""
-        msg = f"CoinGecko API Request - Endpoint: {endpoint}"
         if success:
-            self.coingecko_logger.info(msg)
+            self.coingecko_logger.info("CoinGecko API Request - Endpoint: %s", endpoint)
         else:
-            self.coingecko_logger.error(msg)
+            self.coingecko_logger.error("CoinGecko API Request - Endpoint: %s", endpoint)
 
     def log_claude_analysis(
         self, 
@@ -90,11 +168,15 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
     def log_market_correlation(
         self, 
         correlation_coefficient: float, 
-        price_movement: float
+        price_movement: float,
+        period_hours: Optional[int] = None
     ) -> None:
         """Log market correlation details"""
+        msg = "Market Correlation - "
+        if period_hours is not None:
+            msg += f"Window: {period_hours}h - "
         self.logger.info(
-            "Market Correlation - "
+            msg +
             f"Correlation Coefficient: {correlation_coefficient:.2f} - "
             f"Price Movement: {price_movement:.2f}%"
         )
@@ -107,13 +189,35 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
     ) -> None:
         """Log errors with stack trace option"""
         self.logger.error(
-            f"Error - Type: {error_type} - Message: {message}",
+            "Error - Type: %s - Message: %s", error_type, message,
             exc_info=exc_info if exc_info else False
         )
 
     def log_twitter_action(self, action_type: str, status: str) -> None:
         """Log Twitter related actions"""
-        self.logger.info(f"Twitter Action - Type: {action_type} - Status: {status}")
+        self.logger.info("Twitter Action - Type: %s - Status: %s", action_type, status)
+
+    def log_browser_recycle(
+        self,
+        reason: str,
+        rss_mb: Optional[float] = None,
+        page_loads: Optional[int] = None,
+        duration: Optional[float] = None,
+        success: bool = True
+    ) -> None:
+        """Log a watchdog-triggered browser restart"""
+        msg = f"Browser Recycle - Reason: {reason}"
+        if rss_mb is not None:
+            msg += f" - RSS: {rss_mb:.0f}MB"
+        if page_loads is not None:
+            msg += f" - Page Loads: {page_loads}"
+        if duration is not None:
+            msg += f" - Duration: {duration:.1f}s"
+        msg += f" - Status: {'restored' if success else 'failed'}"
+        if success:
+            self.logger.warning(msg)
+        else:
+            self.logger.error(msg)
 
     def log_startup(self) -> None:
         """Log application startup"""
@@ -127,5 +231,5 @@ class CorrelationLogger:  # Changed from object (not needed in Python 3)
         self.logger.info(f"ETH-BTC Correlation Bot Shutting Down - {time.strftime('%Y-%m-%d %H:%M:%S')}")
         self.logger.info("=" * 50)
 
-# Singleton instance
-logger = CorrelationLogger()
+# Singleton instance; handlers and the listener thread start on first use
+logger: CorrelationLogger = LazySingleton(CorrelationLogger)  # type: ignore[assignment]
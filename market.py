@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+import math
+import time
+import numpy as np
+
+class MarketSnapshot:
+    """One asset's market state, holding only the fields the bot reads
+
+    Numeric slots are named after the market_snapshots columns; missing values are None.
+    """
+
+    __slots__ = ('symbol', 'coin_id', 'name', 'price', 'volume', 'market_cap',
+                 'change_1h', 'change_24h', 'change_7d')
+
+    # Numeric slot -> /coins/markets field it is parsed from
+    SOURCE_FIELDS: Dict[str, str] = {
+        'price': 'current_price',
+        'volume': 'total_volume',
+        'market_cap': 'market_cap',
+        'change_1h': 'price_change_percentage_1h_in_currency',
+        'change_24h': 'price_change_percentage_24h',
+        'change_7d': 'price_change_percentage_7d_in_currency'
+    }
+    NUMERIC_FIELDS: Tuple[str, ...] = tuple(SOURCE_FIELDS)
+
+    def __init__(self,
+                 symbol: str,
+                 coin_id: str,
+                 name: str,
+                 price: float,
+                 volume: Optional[float] = None,
+                 market_cap: Optional[float] = None,
+                 change_1h: Optional[float] = None,
+                 change_24h: Optional[float] = None,
+                 change_7d: Optional[float] = None) -> None:
+        self.symbol: str = symbol
+        self.coin_id: str = coin_id
+        self.name: str = name
+        self.price: float = price
+        self.volume: Optional[float] = volume
+        self.market_cap: Optional[float] = market_cap
+        self.change_1h: Optional[float] = change_1h
+        self.change_24h: Optional[float] = change_24h
+        self.change_7d: Optional[float] = change_7d
+
+    @classmethod
+    def from_coin(cls, coin: Dict[str, Any]) -> 'MarketSnapshot':
+        """Parse a /coins/markets row, reading only the fields kept here"""
+        return cls(
+            coin['symbol'].upper(), coin['id'], coin['name'],
+            **{slot: coin.get(field) for slot, field in cls.SOURCE_FIELDS.items()}
+        )
+
+    def __repr__(self) -> str:
+        return f"MarketSnapshot({self.symbol} ${self.price:,.4f}, 24h {self.change_24h})"
+
+# Every /coins/markets field a snapshot is built from; the rest of each row can be dropped at parse time
+MARKET_ROW_FIELDS = frozenset(('id', 'symbol', 'name', *MarketSnapshot.SOURCE_FIELDS.values()))
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+class MarketBatch:
+    """One fetch of every tracked asset as columns: identity lists and float64 arrays (NaN = missing)
+
+    Indexing by symbol returns a MarketSnapshot built from that row. fetched_at is when the
+    provider served the data, which for a cached response is earlier than the fetch.
+    """
+
+    __slots__ = ('symbols', 'coin_ids', 'names', 'columns', 'fetched_at', '_rows')
+
+    def __init__(self,
+                 symbols: List[str],
+                 coin_ids: List[str],
+                 names: List[str],
+                 columns: Dict[str, np.ndarray],
+                 fetched_at: Optional[float] = None) -> None:
+        self.symbols: List[str] = symbols
+        self.coin_ids: List[str] = coin_ids
+        self.names: List[str] = names
+        self.columns: Dict[str, np.ndarray] = columns
+        self.fetched_at: float = fetched_at if fetched_at is not None else time.time()
+        self._rows: Dict[str, int] = {symbol: row for row, symbol in enumerate(symbols)}
+
+    @classmethod
+    def from_coins(cls, coins: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> 'MarketBatch':
+        """Build from /coins/markets rows in market cap order, keeping the first coin of each symbol"""
+        kept: List[Dict[str, Any]] = []
+        seen = set()
+        for coin in coins:
+            symbol = coin['symbol'].upper()
+            # Keep the highest market cap coin when symbols collide
+            if symbol not in seen and coin.get('current_price') is not None:
+                seen.add(symbol)
+                kept.append(coin)
+
+        columns = {
+            # np.array turns None into NaN for float64
+            slot: np.array([coin.get(field) for coin in kept], dtype=np.float64)
+            for slot, field in MarketSnapshot.SOURCE_FIELDS.items()
+        }
+        return cls(
+            [coin['symbol'].upper() for coin in kept],
+            [coin['id'] for coin in kept],
+            [coin['name'] for coin in kept],
+            columns,
+            fetched_at
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __getitem__(self, symbol: str) -> MarketSnapshot:
+        row = self._rows[symbol]
+        return MarketSnapshot(
+            symbol, self.coin_ids[row], self.names[row],
+            *(_optional(float(self.columns[slot][row])) for slot in MarketSnapshot.NUMERIC_FIELDS)
+        )
+
+    def get(self, symbol: str) -> Optional[MarketSnapshot]:
+        return self[symbol] if symbol in self._rows else None
+
+    def column(self, slot: str) -> np.ndarray:
+        """One numeric field for every asset, in market cap order"""
+        return self.columns[slot]
+
+    def records(self, slots: Tuple[str, ...]) -> Iterator[Tuple[Any, ...]]:
+        """(symbol, *values) per asset for the given numeric slots, NaN as None"""
+        values = zip(*(self.columns[slot].tolist() for slot in slots))
+        for symbol, row in zip(self.symbols, values):
+            yield (symbol, *(_optional(value) for value in row))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Sequence, Tuple, Iterator
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import os
+import threading
+import time
+
+from utils.logger import logger
+
+# Seconds; spans a fast cache hit up to a cycle stuck in login retries
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric(ABC):
+    kind: str = 'untyped'
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines for this metric, HELP/TYPE header included"""
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, description, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float('inf'),)
+        # Per label set: non-cumulative bucket counts, sum, count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * len(self.buckets), [0.0, 0.0]))
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the with-block, including when it raises"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), list(totals)) for key, (counts, totals) in self._series.items()}
+
+        lines = self._header()
+        for key, (counts, (total, count)) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+class CorrelationMetrics:
+    """Bot metrics in the Prometheus text format, served over HTTP or written to a textfile"""
+
+    def __init__(self) -> None:
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        self.stage_latency = Histogram(
+            'correlation_bot_stage_duration_seconds',
+            'Duration of each bot stage (poll, fetch, claude, login, post, cycle)',
+            ['stage']
+        )
+        self.retries = Counter(
+            'correlation_bot_retries_total', 'Retried attempts per operation', ['operation']
+        )
+        self.failures = Counter(
+            'correlation_bot_failures_total', 'Operations that failed after all retries', ['operation']
+        )
+        self.browser_rss = Gauge(
+            'correlation_bot_browser_rss_bytes', 'Resident memory of the Chrome process tree', ['browser']
+        )
+        self.browser_cpu = Gauge(
+            'correlation_bot_browser_cpu_percent', 'CPU usage of the Chrome process tree', ['browser']
+        )
+        self.browser_page_loads = Gauge(
+            'correlation_bot_browser_page_loads', 'Navigations since the driver started', ['browser']
+        )
+        self.rejections = Counter(
+            'correlation_bot_rejections_total', 'Calls refused before reaching a service', ['service', 'reason']
+        )
+        self.circuit_state = Gauge(
+            'correlation_bot_circuit_state', 'Circuit breaker state (0 closed, 1 half open, 2 open)', ['service']
+        )
+        self.cycle_triggers = Counter(
+            'correlation_bot_cycle_triggers_total', 'Full cycles started, by trigger (scheduled, volatility)', ['reason']
+        )
+        self.price_fetches = Counter(
+            'correlation_bot_price_fetches_total', 'Market data fetches by winning source and whether a hedge was sent', ['source', 'hedged']
+        )
+        self.price_hedges = Counter(
+            'correlation_bot_price_hedges_total', 'Hedged requests sent because a source ran past its p95 latency', ['source']
+        )
+        self.browser_recycles = Counter(
+            'correlation_bot_browser_recycles_total', 'Browser replacements by mode (failover or restart)', ['mode']
+        )
+
+        self._metrics: List[_Metric] = [
+            self.stage_latency, self.retries, self.failures, self.rejections, self.circuit_state,
+            self.cycle_triggers, self.price_fetches, self.price_hedges,
+            self.browser_rss, self.browser_cpu, self.browser_page_loads, self.browser_recycles
+        ]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write metrics for node_exporter's textfile collector"""
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.log_error("Metrics Textfile", str(e))
+
+    def start_http_server(self, port: int, host: str = '127.0.0.1') -> bool:
+        """Serve /metrics from a daemon thread"""
+        if self._server is not None:
+            return True
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                return
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.log_error("Metrics Server", f"Cannot bind {host}:{port}: {str(e)}")
+            return False
+
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        logger.logger.info(f"Metrics available at http://{host}:{port}/metrics")
+        return True
+
+    def stop_http_server(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# Create singleton instance
+metrics = CorrelationMetrics()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Optional, Any, TYPE_CHECKING
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import anthropic
+
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.tracing import tracer
+from utils.transport import build_async_session
+from utils.market import MarketBatch
+from config import config
+
+if TYPE_CHECKING:
+    from bot import ETHBTCCorrelationBot
+
+class AsyncCorrelationPipeline:
+    """Fetch, analysis and posting stages running concurrently, linked by bounded queues"""
+
+    # Only the freshest market state is worth analysing or posting
+    ANALYSIS_QUEUE_SIZE: int = 1
+    POST_QUEUE_SIZE: int = 1
+
+    def __init__(self, bot: 'ETHBTCCorrelationBot') -> None:
+        self.bot = bot
+        self.config = config
+        self.claude_client = anthropic.AsyncAnthropic(
+            api_key=self.config.CLAUDE_API_KEY,
+            base_url=self.config.CLAUDE_BASE_URL,
+            # Retries go through the bot's claude_guard
+            max_retries=0
+        )
+        # Selenium is not thread safe; every browser call goes through this one thread
+        self.browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser')
+        self.analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=self.ANALYSIS_QUEUE_SIZE)
+        self.post_queue: asyncio.Queue = asyncio.Queue(maxsize=self.POST_QUEUE_SIZE)
+        self.http: Optional[aiohttp.ClientSession] = None
+
+    async def run(self) -> None:
+        """Set up the browser, then run all stages until cancelled"""
+        loop = asyncio.get_running_loop()
+        try:
+            async with build_async_session(self.config.HTTP_TRANSPORT_CONFIG) as http:
+                self.http = http
+                browser_ready = loop.run_in_executor(self.browser_executor, self.bot._setup_browser)
+                fetcher = asyncio.create_task(self._fetch_stage())
+                analyzer = asyncio.create_task(self._analysis_stage())
+
+                if not await browser_ready:
+                    fetcher.cancel()
+                    analyzer.cancel()
+                    raise Exception("Failed to initialize bot after maximum retries")
+                logger.logger.info("Bot initialized successfully (async pipeline)")
+
+                poster = asyncio.create_task(self._post_stage())
+                await asyncio.gather(fetcher, analyzer, poster)
+        finally:
+            self.http = None
+            self.browser_executor.shutdown(wait=False)
+
+    def _put_latest(self, queue: asyncio.Queue, item: Any, stage: str) -> None:
+        """Enqueue without blocking, replacing the oldest item if the consumer lags"""
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            logger.logger.warning(f"{stage} stage is behind, dropping stale item")
+        queue.put_nowait(item)
+
+    async def _fetch_stage(self) -> None:
+        """Fetch market data when the scheduler says so, independent of downstream stages"""
+        scheduler = self.bot.scheduler
+
+        while True:
+            try:
+                reason = scheduler.due()
+                if reason is None and scheduler.should_poll():
+                    prices = await self._poll_prices()
+                    if prices:
+                        reason = scheduler.check_prices(prices)
+
+                if reason:
+                    metrics.cycle_triggers.inc(reason=reason)
+                    with metrics.stage_latency.time(stage='fetch'), tracer.span('fetch', trigger=reason):
+                        crypto_data = await self._get_crypto_data()
+                    if crypto_data:
+                        self.bot._update_correlation(crypto_data)
+                        self._put_latest(self.analysis_queue, crypto_data, "Analysis")
+                    scheduler.record_run(crypto_data is not None, self.bot._reference_prices(crypto_data))
+            except Exception as e:
+                logger.log_error("Async Fetch Stage", str(e), exc_info=True)
+                scheduler.record_run(False)
+
+            await asyncio.sleep(scheduler.sleep_time())
+
+    async def _poll_prices(self) -> Optional[Dict[str, float]]:
+        """Async counterpart of ETHBTCCorrelationBot._poll_prices"""
+        async def poll(attempt: int) -> Any:
+            with metrics.stage_latency.time(stage='poll'), tracer.span('coingecko.poll'):
+                return await self.bot.coingecko.get_timed_json_async(
+                    self.http, '/simple/price', self.bot._simple_price_params()
+                )
+
+        try:
+            data, fetched_at = await self.bot.coingecko_guard.call_async(poll, attempts=1)
+        except Exception as e:
+            logger.log_coingecko_request("/simple/price", success=False)
+            logger.logger.warning(f"Price poll failed: {str(e)}")
+            return None
+        return self.bot._record_poll(self.bot._parse_simple_prices(data), fetched_at)
+
+    async def _get_crypto_data(self) -> Optional[MarketBatch]:
+        """Async counterpart of ETHBTCCorrelationBot._get_crypto_data"""
+        result = await self.bot.price_fetcher.fetch_async(self.http, self.config.MARKET_DATA_FIELDS)
+        if result is None:
+            logger.log_error("Crypto Data", "No price source returned market data")
+            return None
+        coins, _, fetched_at = result
+        # SQLite insert happens off the event loop
+        return await asyncio.to_thread(self.bot._index_crypto_data, coins, fetched_at)
+
+    async def _analysis_stage(self) -> None:
+        """Turn market snapshots into tweets while the browser is busy posting"""
+        while True:
+            crypto_data = await self.analysis_queue.get()
+            try:
+                with tracer.span('analyze'):
+                    tweet_text = await self._analyze_market_sentiment(crypto_data)
+                if tweet_text:
+                    self._put_latest(self.post_queue, tweet_text, "Post")
+            except Exception as e:
+                logger.log_error("Async Analysis Stage", str(e), exc_info=True)
+            finally:
+                self.analysis_queue.task_done()
+
+    async def _analyze_market_sentiment(self, crypto_data: MarketBatch) -> Optional[str]:
+        """Async counterpart of ETHBTCCorrelationBot._analyze_market_sentiment"""
+        cached_tweet = self.bot._get_cached_analysis(crypto_data)
+        if cached_tweet:
+            return cached_tweet
+
+        prompt = await asyncio.to_thread(self.bot._build_analysis_prompt, crypto_data)
+        budget = self.bot._analysis_budget(crypto_data['BTC'], crypto_data['ETH'])
+
+        async def stream_analysis(attempt: int) -> str:
+            with tracer.span('claude.stream', attempt=attempt, budget=budget) as span:
+                analysis = ""
+                with metrics.stage_latency.time(stage='claude'):
+                    async with self.claude_client.messages.stream(
+                        model=self.config.CLAUDE_MODEL,
+                        max_tokens=250,
+                        messages=[{"role": "user", "content": prompt}]
+                    ) as stream:
+                        async for text in stream.text_stream:
+                            analysis += text
+                            if len(analysis) >= budget:
+                                logger.claude_logger.info(f"Stopped Claude stream early at {len(analysis)} chars")
+                                break
+                span.set_attribute('chars', len(analysis))
+            return analysis
+
+        try:
+            analysis = await self.bot.claude_guard.call_async(stream_analysis)
+        except Exception as e:
+            logger.log_error("Market Sentiment Analysis", str(e))
+            return None
+
+        analysis = self.bot._trim_analysis(analysis, budget)
+        self.bot._cache_analysis(crypto_data, analysis)
+        return self.bot._format_tweet_analysis(analysis, crypto_data['BTC'], crypto_data['ETH'])
+
+    async def _post_stage(self) -> None:
+        """Post tweets on the browser thread; a slow post only delays later posts"""
+        loop = asyncio.get_running_loop()
+        while True:
+            tweet_text = await self.post_queue.get()
+            try:
+                with metrics.stage_latency.time(stage='post'), tracer.span('post'):
+                    # Carry the current span over to the browser thread so its spans nest under it
+                    context = contextvars.copy_context()
+                    await loop.run_in_executor(
+                        self.browser_executor, context.run, self.bot._post_analysis, tweet_text
+                    )
+                await loop.run_in_executor(self.browser_executor, self.bot._check_browser_health)
+                if self.config.METRICS_TEXTFILE_PATH:
+                    await asyncio.to_thread(metrics.write_textfile, self.config.METRICS_TEXTFILE_PATH)
+            except Exception as e:
+                logger.log_error("Async Post Stage", str(e), exc_info=True)
+            finally:
+                self.post_queue.task_done()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, Callable, Tuple, Deque, TYPE_CHECKING
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+import asyncio
+import contextvars
+import math
+import threading
+import time
+
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.tracing import tracer
+from utils.coingecko import CoinGeckoClient
+from utils.resilience import ServiceGuard, service_guards
+from utils.transport import build_session
+from config import config
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Rows shaped like /coins/markets, and the time the provider served them
+MarketRows = Tuple[List[Dict[str, Any]], float]
+
+class PriceSource(ABC):
+    """A market data provider returning rows shaped like CoinGecko /coins/markets
+
+    Rows carry at least id, symbol, name and current_price, plus whichever of the
+    requested fields the provider has. Rows replayed from a cache keep the time they
+    were first served. Failures raise; an empty result is a failure too.
+    """
+
+    name: str = 'source'
+
+    @abstractmethod
+    def fetch(self, fields: List[str]) -> MarketRows:
+        """The top TRACKED_ASSET_COUNT assets by market cap"""
+
+    async def fetch_async(self, http: 'aiohttp.ClientSession', fields: List[str]) -> MarketRows:
+        """Defaults to running fetch on a worker thread"""
+        return await asyncio.to_thread(self.fetch, fields)
+
+class CoinGeckoSource(PriceSource):
+    """CoinGecko, via /simple/price while a recent ranking exists and /coins/markets pages otherwise"""
+
+    name = 'coingecko'
+
+    def __init__(self, client: CoinGeckoClient, guard: ServiceGuard) -> None:
+        self.client = client
+        self.guard = guard
+        self.config = config
+
+    def fetch(self, fields: List[str]) -> MarketRows:
+        if self.client.choose_markets_endpoint(fields) == '/simple/price':
+            try:
+                return self._fetch_simple(fields)
+            except Exception as e:
+                logger.logger.warning(f"/simple/price fetch failed, falling back to /coins/markets: {str(e)}")
+
+        coins: List[Dict[str, Any]] = []
+        # Pages may come from cache; the oldest one dates the whole ranking
+        fetched_at = float('inf')
+        for params in self.config.get_coingecko_page_params():
+            try:
+                page, page_fetched_at = self._fetch_page(params)
+            except Exception:
+                if not coins:
+                    raise
+                logger.logger.warning(f"CoinGecko page {params['page']} unavailable, using partial data")
+                return coins, fetched_at
+
+            coins.extend(page)
+            fetched_at = min(fetched_at, page_fetched_at)
+            if len(page) < params['per_page']:
+                break
+
+        coins = coins[:self.config.TRACKED_ASSET_COUNT]
+        self.client.remember_universe(coins)
+        return coins, fetched_at
+
+    def _fetch_simple(self, fields: List[str]) -> MarketRows:
+        """All ranked assets in one /simple/price request"""
+        params = self.client.simple_price_params(fields)
+
+        def fetch(attempt: int) -> Any:
+            with tracer.span('coingecko.simple_price', attempt=attempt):
+                return self.client.get_timed_json('/simple/price', params)
+
+        try:
+            data, fetched_at = self.guard.call(fetch)
+            coins = self.client.markets_from_simple_price(data, fields)
+        except Exception:
+            logger.log_coingecko_request("/simple/price", success=False)
+            raise
+        logger.log_coingecko_request("/simple/price", success=True)
+        return coins, fetched_at
+
+    def _fetch_page(self, params: Dict[str, Any]) -> MarketRows:
+        """One /coins/markets page"""
+        def fetch(attempt: int) -> Any:
+            with tracer.span('coingecko.markets', page=params['page'], attempt=attempt):
+                return self.client.get_timed_json('/coins/markets', params)
+
+        try:
+            coins = self.guard.call(fetch)
+        except Exception:
+            logger.log_coingecko_request("/markets", success=False)
+            raise
+        logger.log_coingecko_request(f"/markets?page={params['page']}", success=True)
+        return coins
+
+    async def fetch_async(self, http: 'aiohttp.ClientSession', fields: List[str]) -> MarketRows:
+        if self.client.choose_markets_endpoint(fields) == '/simple/price':
+            params = self.client.simple_price_params(fields)
+
+            async def fetch_simple(attempt: int) -> Any:
+                with tracer.span('coingecko.simple_price', attempt=attempt):
+                    return await self.client.get_timed_json_async(http, '/simple/price', params)
+
+            try:
+                data, fetched_at = await self.guard.call_async(fetch_simple)
+                logger.log_coingecko_request("/simple/price", success=True)
+                return self.client.markets_from_simple_price(data, fields), fetched_at
+            except Exception as e:
+                logger.log_coingecko_request("/simple/price", success=False)
+                logger.logger.warning(f"/simple/price fetch failed, falling back to /coins/markets: {str(e)}")
+
+        coins: List[Dict[str, Any]] = []
+        fetched_at = float('inf')
+        for params in self.config.get_coingecko_page_params():
+            async def fetch_page(attempt: int, params: Dict[str, Any] = params) -> Any:
+                with tracer.span('coingecko.markets', page=params['page'], attempt=attempt):
+                    return await self.client.get_timed_json_async(http, '/coins/markets', params)
+
+            try:
+                page, page_fetched_at = await self.guard.call_async(fetch_page)
+                logger.log_coingecko_request(f"/markets?page={params['page']}", success=True)
+            except Exception:
+                logger.log_coingecko_request("/markets", success=False)
+                if not coins:
+                    raise
+                logger.logger.warning(f"CoinGecko page {params['page']} unavailable, using partial data")
+                return coins, fetched_at
+
+            coins.extend(page)
+            fetched_at = min(fetched_at, page_fetched_at)
+            if len(page) < params['per_page']:
+                break
+
+        coins = coins[:self.config.TRACKED_ASSET_COUNT]
+        self.client.remember_universe(coins)
+        return coins, fetched_at
+
+class CoinCapSource(PriceSource):
+    """CoinCap /assets, ranked by market cap; 1h/7d changes are not available"""
+
+    name = 'coincap'
+
+    def __init__(self, base_url: str, api_key: str, guard: ServiceGuard) -> None:
+        self.base_url: str = base_url.rstrip('/')
+        self.guard = guard
+        self.session = build_session(config.HTTP_TRANSPORT_CONFIG)
+        self.headers: Dict[str, str] = {'Authorization': f"Bearer {api_key}"}
+
+    @staticmethod
+    def _number(value: Any) -> Optional[float]:
+        # CoinCap sends every number as a string, and null for unknowns
+        return float(value) if value not in (None, '') else None
+
+    def normalize(self, assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """CoinCap assets as /coins/markets rows"""
+        coins: List[Dict[str, Any]] = []
+        for asset in assets:
+            price = self._number(asset.get('priceUsd'))
+            if price is None:
+                continue
+            coins.append({
+                'id': asset['id'],
+                'symbol': asset['symbol'].lower(),
+                'name': asset['name'],
+                'current_price': price,
+                'market_cap': self._number(asset.get('marketCapUsd')),
+                'total_volume': self._number(asset.get('volumeUsd24Hr')),
+                'price_change_percentage_24h': self._number(asset.get('changePercent24Hr'))
+            })
+        return coins
+
+    def fetch(self, fields: List[str]) -> MarketRows:
+        def fetch(attempt: int) -> Any:
+            with tracer.span('coincap.assets', attempt=attempt):
+                response = self.session.get(f"{self.base_url}/assets", params={'limit': config.TRACKED_ASSET_COUNT}, headers=self.headers)
+                response.raise_for_status()
+                return response.json()
+
+        # Not cached, so every answer is new
+        return self.normalize(self.guard.call(fetch)['data']), time.time()
+
+    async def fetch_async(self, http: 'aiohttp.ClientSession', fields: List[str]) -> MarketRows:
+        async def fetch(attempt: int) -> Any:
+            with tracer.span('coincap.assets', attempt=attempt):
+                async with http.get(f"{self.base_url}/assets", params={'limit': config.TRACKED_ASSET_COUNT}, headers=self.headers) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+
+        return self.normalize((await self.guard.call_async(fetch))['data']), time.time()
+
+class HedgedPriceFetcher:
+    """Asks the sources in priority order, hedging to the next one when the current one runs past its p95 latency
+
+    The first valid answer wins. A source that fails outright hands over immediately
+    instead of waiting out the hedge delay. With hedging off this is plain failover.
+    """
+
+    def __init__(self,
+                 sources: List[PriceSource],
+                 hedge: bool = True,
+                 hedge_quantile: float = 0.95,
+                 initial_hedge_delay: float = 5.0,
+                 min_hedge_delay: float = 0.25,
+                 max_hedge_delay: float = 10.0,
+                 latency_window: int = 200,
+                 min_samples: int = 20,
+                 required_symbols: Tuple[str, ...] = ('BTC', 'ETH')) -> None:
+        if not sources:
+            raise ValueError("At least one price source is required")
+        self.sources: List[PriceSource] = sources
+        self.hedge: bool = hedge
+        self.hedge_quantile: float = hedge_quantile
+        # Used until a source has min_samples successful latencies
+        self.initial_hedge_delay: float = initial_hedge_delay
+        self.min_hedge_delay: float = min_hedge_delay
+        # A heavy tail can pull the p95 itself into the slow mode; never wait longer than this
+        self.max_hedge_delay: float = max_hedge_delay
+        self.min_samples: int = min_samples
+        self.required_symbols: Tuple[str, ...] = required_symbols
+        self._latencies: Dict[str, Deque[float]] = {
+            source.name: deque(maxlen=latency_window) for source in sources
+        }
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, source: PriceSource) -> float:
+        """Seconds to wait on a source before also asking the next one: its recent p95, once known, within bounds"""
+        with self._lock:
+            samples = sorted(self._latencies[source.name])
+        if len(samples) < self.min_samples:
+            return self.initial_hedge_delay
+        rank = max(0, math.ceil(self.hedge_quantile * len(samples)) - 1)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, samples[rank]))
+
+    def _timeout(self, pending: List[PriceSource], remaining: List[PriceSource]) -> Optional[float]:
+        """How long to wait for a pending answer before hedging; None to wait for it regardless"""
+        if not self.hedge or not remaining:
+            return None
+        return self.hedge_delay(pending[-1])
+
+    def _validate(self, source: PriceSource, rows: MarketRows, started: float) -> MarketRows:
+        coins, _ = rows
+        symbols = {coin['symbol'].upper() for coin in coins or []}
+        if not all(symbol in symbols for symbol in self.required_symbols):
+            raise ValueError(f"{source.name} returned no {'/'.join(self.required_symbols)} data")
+        # Only valid answers count towards the latency a hedge is measured against
+        with self._lock:
+            self._latencies[source.name].append(time.monotonic() - started)
+        return rows
+
+    def _timed_fetch(self, source: PriceSource, fields: List[str], hedge: bool) -> MarketRows:
+        # hedge: launched while an earlier source was still pending
+        with tracer.span('price_source', source=source.name, hedge=hedge):
+            started = time.monotonic()
+            return self._validate(source, source.fetch(fields), started)
+
+    def _hedging(self, slow: PriceSource, timeout: float, backup: PriceSource) -> None:
+        metrics.price_hedges.inc(source=slow.name)
+        logger.logger.warning(f"{slow.name} slower than {timeout:.2f}s, hedging to {backup.name}")
+
+    def _won(self, source: PriceSource, hedged: bool) -> None:
+        metrics.price_fetches.inc(source=source.name, hedged=str(hedged).lower())
+        if source is not self.sources[0]:
+            logger.logger.info(f"Market data served by {source.name}")
+
+    @staticmethod
+    def _submit(source: PriceSource, fn: Callable[..., MarketRows], *args: Any) -> Future:
+        """Run fn on a thread of its own
+
+        Threads cannot be cancelled, so a losing request keeps running; on a shared pool
+        a few stalled ones would hold up the next cycle's hedge.
+        """
+        future: Future = Future()
+        # Threads start with an empty context; run in a copy of the caller's so the
+        # price_source span and its provider spans nest under the caller's 'fetch' span
+        context = contextvars.copy_context()
+
+        def run() -> None:
+            try:
+                future.set_result(context.run(fn, *args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"price-source-{source.name}", daemon=True).start()
+        return future
+
+    def fetch(self, fields: List[str]) -> Optional[Tuple[List[Dict[str, Any]], str, float]]:
+        """(rows, source name, fetched_at) from the first source to answer validly, or None if all failed"""
+        pending: Dict[Future, PriceSource] = {}
+        remaining = list(self.sources)
+        hedged = False
+
+        def launch() -> None:
+            source = remaining.pop(0)
+            pending[self._submit(source, self._timed_fetch, source, fields, bool(pending))] = source
+
+        launch()
+        while pending:
+            timeout = self._timeout(list(pending.values()), remaining)
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self._hedging(list(pending.values())[-1], timeout, remaining[0])
+                hedged = True
+                launch()
+                continue
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    coins, fetched_at = future.result()
+                except Exception as e:
+                    logger.log_error("Price Source", f"{source.name}: {str(e)}")
+                    if remaining and not pending:
+                        launch()
+                    continue
+                # A losing request finishes in the background and is dropped
+                self._won(source, hedged)
+                return coins, source.name, fetched_at
+        return None
+
+    async def fetch_async(self,
+                          http: 'aiohttp.ClientSession',
+                          fields: List[str]) -> Optional[Tuple[List[Dict[str, Any]], str, float]]:
+        """Async counterpart of fetch; losing requests are cancelled"""
+        pending: Dict[asyncio.Task, PriceSource] = {}
+        remaining = list(self.sources)
+        hedged = False
+
+        async def timed_fetch(source: PriceSource, hedge: bool) -> MarketRows:
+            with tracer.span('price_source', source=source.name, hedge=hedge):
+                started = time.monotonic()
+                return self._validate(source, await source.fetch_async(http, fields), started)
+
+        def launch() -> None:
+            source = remaining.pop(0)
+            # Tasks start in a copy of the current context, so their spans nest under the caller's
+            pending[asyncio.create_task(timed_fetch(source, bool(pending)))] = source
+
+        launch()
+        try:
+            while pending:
+                timeout = self._timeout(list(pending.values()), remaining)
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._hedging(list(pending.values())[-1], timeout, remaining[0])
+                    hedged = True
+                    launch()
+                    continue
+
+                for task in done:
+                    source = pending.pop(task)
+                    try:
+                        coins, fetched_at = task.result()
+                    except Exception as e:
+                        logger.log_error("Price Source", f"{source.name}: {str(e)}")
+                        if remaining and not pending:
+                            launch()
+                        continue
+                    self._won(source, hedged)
+                    return coins, source.name, fetched_at
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+def build_price_sources(names: List[str], client: CoinGeckoClient) -> List[PriceSource]:
+    """Sources in priority order from their config names"""
+    sources: List[PriceSource] = []
+    for name in names:
+        if name == 'coingecko':
+            sources.append(CoinGeckoSource(client, service_guards.get('coingecko')))
+        elif name == 'coincap':
+            if not config.COINCAP_API_KEY:
+                logger.logger.warning("COINCAP_API_KEY not set, CoinCap price source disabled")
+                continue
+            sources.append(CoinCapSource(config.COINCAP_BASE_URL, config.COINCAP_API_KEY, service_guards.get('coincap')))
+        else:
+            logger.log_error("Price Source", f"Unknown price source '{name}', skipping")
+    return sources
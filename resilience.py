@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Optional, Any, Callable, Awaitable
+from email.utils import parsedate_to_datetime
+import asyncio
+import random
+import threading
+import time
+
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.lazy import LazySingleton
+from config import config, ServiceLimits
+
+class ServiceUnavailable(Exception):
+    """Raised without calling the service: its circuit is open or its rate limit would need too long a wait"""
+
+    def __init__(self, service: str, reason: str, retry_after: float) -> None:
+        super().__init__(f"{service} unavailable ({reason}), retry in {retry_after:.1f}s")
+        self.service: str = service
+        self.reason: str = reason
+        self.retry_after: float = retry_after
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a requests, aiohttp or anthropic error, if it carries one"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    return status if isinstance(status, int) else None
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date) on the error's response"""
+    headers = getattr(error, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx are transient; other 4xx and bad data are not"""
+    if isinstance(error, ServiceUnavailable):
+        return False
+    status = status_of(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return not isinstance(error, (ValueError, TypeError, KeyError))
+
+class TokenBucket:
+    """Client-side rate limit shared by every caller of one service"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.clock = clock
+        self._tokens: float = capacity
+        self._updated: float = clock()
+        # A Retry-After from the server empties the bucket until this time
+        self._blocked_until: float = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait(self, now: float) -> float:
+        self._refill(now)
+        wait = max(0.0, self._blocked_until - now)
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.rate)
+        return wait
+
+    def next_available(self) -> float:
+        """Seconds until a token can be taken"""
+        with self._lock:
+            return self._wait(self.clock())
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token, returning how long to wait before using it, or None if that exceeds max_wait"""
+        with self._lock:
+            wait = self._wait(self.clock())
+            if wait > max_wait:
+                return None
+            # Tokens go negative so concurrent callers queue up behind each other
+            self._tokens -= 1
+            return wait
+
+    def block(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+            self._tokens = 0.0
+
+class CircuitBreaker:
+    """closed -> open after consecutive failures -> half_open single probe after reset_timeout"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self,
+                 failure_threshold: int,
+                 reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self.clock = clock
+        self.state: str = self.CLOSED
+        self.failures: int = 0
+        self._opened_at: float = 0.0
+        self._open_for: float = reset_timeout
+        self._probing: bool = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self._open_for - self.clock())
+
+    def allow(self) -> bool:
+        """Whether a call may go through; in half_open only one probe at a time"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.retry_after() > 0:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, retry_after: Optional[float] = None) -> bool:
+        """Count a failure; returns True if this opened the circuit"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                opened = self.state != self.OPEN
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+                # Stay open at least as long as the server asked us to back off
+                self._open_for = max(self.reset_timeout, retry_after or 0.0)
+                return opened
+            return False
+
+    def release(self) -> None:
+        """End a probe whose outcome says nothing about service health"""
+        with self._lock:
+            self._probing = False
+
+class ServiceGuard:
+    """Rate limit, circuit breaker and jittered exponential backoff around calls to one service"""
+
+    STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+    def __init__(self, name: str, limits: ServiceLimits) -> None:
+        self.name: str = name
+        self.limits: ServiceLimits = limits
+        self.bucket = TokenBucket(limits['rate_per_minute'] / 60, limits['burst'])
+        self.breaker = CircuitBreaker(limits['failure_threshold'], limits['reset_timeout'])
+        metrics.circuit_state.set(0, service=name)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential delay before retry number `attempt`, at least Retry-After"""
+        ceiling = min(self.limits['max_delay'], self.limits['base_delay'] * 2 ** (attempt - 1))
+        return max(random.uniform(0, ceiling), retry_after or 0.0)
+
+    def _admit(self, deadline: float) -> float:
+        """Seconds to wait before the next attempt may be sent, or raise ServiceUnavailable"""
+        if not self.breaker.allow():
+            metrics.rejections.inc(service=self.name, reason='circuit_open')
+            raise ServiceUnavailable(self.name, 'circuit open', self.breaker.retry_after())
+        wait = self.bucket.reserve(max(0.0, deadline - time.monotonic()))
+        if wait is None:
+            self.breaker.release()
+            metrics.rejections.inc(service=self.name, reason='rate_limited')
+            raise ServiceUnavailable(self.name, 'rate limited', self.bucket.next_available())
+        return wait
+
+    def _on_success(self) -> None:
+        self.breaker.record_success()
+        metrics.circuit_state.set(0, service=self.name)
+
+    def _on_failure(self, error: Exception, attempt: int, attempts: int, deadline: float) -> Optional[float]:
+        """Record a failed attempt; returns the delay before retrying, or None to give up"""
+        if not is_retryable(error):
+            self.breaker.release()
+            return None
+
+        retry_after = retry_after_of(error)
+        if retry_after is not None and status_of(error) in (429, 503, 529):
+            self.bucket.block(retry_after)
+        if self.breaker.record_failure(retry_after):
+            logger.log_error(
+                "Circuit Breaker",
+                f"{self.name} circuit opened after {self.breaker.failures} failures, "
+                f"probing again in {self.breaker.retry_after():.0f}s"
+            )
+        metrics.circuit_state.set(self.STATE_VALUES[self.breaker.state], service=self.name)
+
+        if attempt >= attempts or self.breaker.state == CircuitBreaker.OPEN:
+            return None
+        delay = self.backoff(attempt, retry_after)
+        if time.monotonic() + delay > deadline:
+            return None
+        metrics.retries.inc(operation=self.name)
+        logger.logger.warning(
+            f"{self.name} error ({type(error).__name__}: {error}), attempt {attempt}, retrying in {delay:.1f}s"
+        )
+        return delay
+
+    def call(self, fn: Callable[[int], Any], attempts: Optional[int] = None) -> Any:
+        """Call fn(attempt) until it succeeds; raises its last error or ServiceUnavailable"""
+        attempts = attempts or self.limits['max_attempts']
+        deadline = time.monotonic() + self.limits['max_wait']
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self._admit(deadline)
+            if wait:
+                time.sleep(wait)
+            try:
+                result = fn(attempt)
+            except Exception as e:
+                delay = self._on_failure(e, attempt, attempts, deadline)
+                if delay is None:
+                    metrics.failures.inc(operation=self.name)
+                    raise
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def call_async(self, fn: Callable[[int], Awaitable[Any]], attempts: Optional[int] = None) -> Any:
+        """Async counterpart of call"""
+        attempts = attempts or self.limits['max_attempts']
+        deadline = time.monotonic() + self.limits['max_wait']
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = self._admit(deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await fn(attempt)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                delay = self._on_failure(e, attempt, attempts, deadline)
+                if delay is None:
+                    metrics.failures.inc(operation=self.name)
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+class ServiceGuards:
+    """One ServiceGuard per configured service, shared by the sync bot and the async pipeline"""
+
+    def __init__(self, limits: Dict[str, ServiceLimits]) -> None:
+        self._guards: Dict[str, ServiceGuard] = {name: ServiceGuard(name, value) for name, value in limits.items()}
+
+    def get(self, name: str) -> ServiceGuard:
+        return self._guards[name]
+
+# Create singleton instance
+service_guards: ServiceGuards = LazySingleton(  # type: ignore[assignment]
+    lambda: ServiceGuards(config.SERVICE_LIMITS)
+)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Optional, Callable
+import math
+import time
+
+from utils.logger import logger
+
+MISSED_RUN_POLICIES = ('run_once', 'skip')
+
+def _clock() -> float:
+    # CLOCK_BOOTTIME keeps counting while the host is suspended, so a laptop or VM
+    # that slept through several intervals is seen as having missed them
+    return time.clock_gettime(time.CLOCK_BOOTTIME)
+
+default_clock: Callable[[], float] = _clock if hasattr(time, 'CLOCK_BOOTTIME') else time.monotonic
+
+class CycleScheduler:
+    """Decides when a full cycle runs: at aligned interval boundaries, or early on a large price move
+
+    Deadlines live on a monotonic clock so cycle duration and wall-clock steps cannot make
+    the schedule drift; the wall clock is only read to align deadlines to boundaries.
+
+    Missed-run policies, applied when a deadline is found more than `misfire_grace` late:
+        run_once  run a single cycle now for all missed boundaries
+        skip      drop the missed runs and wait for the next boundary
+
+    Missed cycles are never replayed: each would analyze and post the same live market again.
+    """
+
+    def __init__(self,
+                 interval: float,
+                 poll_interval: float,
+                 volatility_threshold: float,
+                 align: bool = True,
+                 missed_run_policy: str = 'run_once',
+                 misfire_grace: float = 60,
+                 min_trigger_gap: float = 300,
+                 error_backoff: float = 30,
+                 max_error_backoff: float = 300,
+                 clock: Callable[[], float] = default_clock,
+                 wall_clock: Callable[[], float] = time.time) -> None:
+        if missed_run_policy not in MISSED_RUN_POLICIES:
+            raise ValueError(f"Unknown missed run policy {missed_run_policy!r}, expected one of {MISSED_RUN_POLICIES}")
+        self.interval: float = interval
+        self.poll_interval: float = poll_interval
+        # Percent move since the last full cycle that triggers an early one
+        self.volatility_threshold: float = volatility_threshold
+        self.align: bool = align
+        self.missed_run_policy: str = missed_run_policy
+        self.misfire_grace: float = misfire_grace
+        # Caps triggered cycles (and Claude calls) during a sustained move
+        self.min_trigger_gap: float = min_trigger_gap
+        self.error_backoff: float = error_backoff
+        self.max_error_backoff: float = max_error_backoff
+        self.clock = clock
+        self.wall_clock = wall_clock
+
+        # The first cycle runs immediately
+        self.next_run: float = clock()
+        self.last_run: Optional[float] = None
+        self.reference_prices: Dict[str, float] = {}
+        self.failures: int = 0
+
+    def _next_boundary(self, now: float) -> float:
+        """Monotonic deadline of the first interval boundary after now"""
+        if not self.align:
+            return now + self.interval
+        wall = self.wall_clock()
+        boundary = (math.floor(wall / self.interval) + 1) * self.interval
+        return now + (boundary - wall)
+
+    def due(self) -> Optional[str]:
+        """'scheduled' when a timed cycle should run now, else None"""
+        now = self.clock()
+        if now < self.next_run:
+            return None
+
+        late = now - self.next_run
+        if late > self.misfire_grace and self.last_run is not None and not self.failures:
+            missed = int(late // self.interval) + 1
+            if self.missed_run_policy == 'skip':
+                self.next_run = self._next_boundary(now)
+                logger.logger.warning(
+                    "Skipped %d missed cycle(s), next in %.0fs", missed, self.next_run - now
+                )
+                return None
+            logger.logger.warning("Running once for %d missed cycle(s)", missed)
+        return 'scheduled'
+
+    def price_move(self, prices: Dict[str, float]) -> float:
+        """Largest absolute percent move of any asset since the last full cycle"""
+        moves = [
+            abs(price / self.reference_prices[symbol] - 1) * 100
+            for symbol, price in prices.items()
+            if self.reference_prices.get(symbol)
+        ]
+        return max(moves, default=0.0)
+
+    def should_poll(self) -> bool:
+        """Whether a price poll could trigger a cycle right now"""
+        if not self.reference_prices or self.failures:
+            return False
+        return self.last_run is None or self.clock() - self.last_run >= self.min_trigger_gap
+
+    def check_prices(self, prices: Dict[str, float]) -> Optional[str]:
+        """'volatility' when a polled price moved past the threshold, else None"""
+        if not self.should_poll():
+            return None
+        move = self.price_move(prices)
+        if move >= self.volatility_threshold:
+            logger.logger.info(
+                "Price moved %.2f%% since the last cycle (threshold %.2f%%)", move, self.volatility_threshold
+            )
+            return 'volatility'
+        return None
+
+    def record_run(self, success: bool, prices: Optional[Dict[str, float]] = None) -> None:
+        """Schedule the next cycle after one finished"""
+        now = self.clock()
+        self.last_run = now
+        if prices:
+            self.reference_prices = dict(prices)
+
+        if success:
+            self.failures = 0
+            self.next_run = self._next_boundary(now)
+            # A cycle that ran just before a boundary (the startup one, or one triggered by a
+            # move) would otherwise be followed within seconds by another on the same data
+            if self.next_run - now < min(self.min_trigger_gap, self.interval / 2):
+                self.next_run += self.interval
+            return
+
+        self.failures += 1
+        backoff = min(self.max_error_backoff, self.error_backoff * 2 ** (self.failures - 1))
+        # Retry sooner than the next boundary, never later
+        self.next_run = min(now + backoff, self._next_boundary(now))
+        logger.logger.warning(
+            "Cycle failed (%d in a row), retrying in %.0fs", self.failures, self.next_run - now
+        )
+
+    def sleep_time(self) -> float:
+        """Seconds until the next deadline or price poll, whichever is first"""
+        now = self.clock()
+        until_run = max(0.0, self.next_run - now)
+        if not self.reference_prices or self.failures:
+            return until_run
+        until_poll = self.poll_interval
+        if self.last_run is not None:
+            # Polls inside the trigger gap could not start a cycle anyway
+            until_poll = max(until_poll, self.last_run + self.min_trigger_gap - now)
+        return min(until_run, until_poll)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import List, Optional, Any, Tuple
+import sqlite3
+import threading
+import time
+import numpy as np
+
+from utils.logger import logger
+from utils.lazy import LazySingleton
+from utils.market import MarketBatch, MarketSnapshot
+from config import config
+
+class MarketDataStore:
+    """SQLite time-series store for CoinGecko market snapshots"""
+
+    # Columns that can be queried as series, one per numeric MarketSnapshot field
+    SERIES_FIELDS: Tuple[str, ...] = MarketSnapshot.NUMERIC_FIELDS
+
+    SCHEMA: str = """
+    CREATE TABLE IF NOT EXISTS market_snapshots (
+        symbol TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        price REAL,
+        volume REAL,
+        market_cap REAL,
+        change_1h REAL,
+        change_24h REAL,
+        change_7d REAL,
+        PRIMARY KEY (symbol, timestamp)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_market_snapshots_timestamp
+        ON market_snapshots (timestamp);
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path: str = db_path or config.DATABASE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily and make sure the schema exists"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL lets readers run alongside the writer of each fetch
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+            logger.logger.info(f"Market data store opened: {self.db_path}")
+        return self._conn
+
+    def insert_snapshots(self,
+                         batch: MarketBatch,
+                         timestamp: Optional[float] = None) -> int:
+        """Insert one fetch worth of coin data in a single transaction"""
+        ts = timestamp if timestamp is not None else time.time()
+        columns = list(self.SERIES_FIELDS)
+        rows: List[Tuple[Any, ...]] = [
+            (symbol, ts, *values) for symbol, *values in batch.records(self.SERIES_FIELDS)
+        ]
+        if not rows:
+            return 0
+
+        placeholders = ', '.join('?' * (len(columns) + 2))
+        query = (
+            f"INSERT OR REPLACE INTO market_snapshots "
+            f"(symbol, timestamp, {', '.join(columns)}) VALUES ({placeholders})"
+        )
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(query, rows)
+            return len(rows)
+        except sqlite3.Error as e:
+            logger.log_error("Market Data Store", f"Failed to insert snapshots: {str(e)}")
+            return 0
+
+    def get_series(self,
+                   symbol: str,
+                   start: Optional[float] = None,
+                   end: Optional[float] = None,
+                   field: str = 'price') -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, values) arrays for a symbol within [start, end]"""
+        if field not in self.SERIES_FIELDS:
+            raise ValueError(f"Unknown series field: {field}")
+
+        query = (
+            f"SELECT timestamp, {field} FROM market_snapshots "
+            "WHERE symbol = ? AND timestamp >= ? AND timestamp <= ? "
+            "ORDER BY timestamp"
+        )
+        params = (
+            symbol.upper(),
+            start if start is not None else float('-inf'),
+            end if end is not None else float('inf')
+        )
+        try:
+            with self._lock:
+                rows = self._connect().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.log_error("Market Data Store", f"Failed to query {symbol}: {str(e)}")
+            rows = []
+
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+        return data[:, 0], data[:, 1]
+
+    def get_matrix(self,
+                   start: Optional[float] = None,
+                   end: Optional[float] = None,
+                   field: str = 'price',
+                   symbols: Optional[List[str]] = None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Return (timestamps, symbols, values) with values shaped (len(timestamps), len(symbols))
+
+        Missing observations are NaN. Symbols default to every symbol seen in the range.
+        """
+        if field not in self.SERIES_FIELDS:
+            raise ValueError(f"Unknown series field: {field}")
+
+        query = (
+            f"SELECT symbol, timestamp, {field} FROM market_snapshots "
+            "WHERE timestamp >= ? AND timestamp <= ?"
+        )
+        params: List[Any] = [
+            start if start is not None else float('-inf'),
+            end if end is not None else float('inf')
+        ]
+        if symbols:
+            symbols = [symbol.upper() for symbol in symbols]
+            query += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params.extend(symbols)
+        try:
+            with self._lock:
+                rows = self._connect().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.log_error("Market Data Store", f"Failed to query matrix: {str(e)}")
+            rows = []
+
+        if not rows:
+            return np.empty(0), list(symbols or []), np.empty((0, len(symbols or [])))
+
+        row_symbols, row_ts, row_values = zip(*rows)
+        columns = symbols or sorted(set(row_symbols))
+        column_index = {symbol: i for i, symbol in enumerate(columns)}
+
+        timestamps, time_index = np.unique(np.asarray(row_ts, dtype=np.float64), return_inverse=True)
+        symbol_index = np.fromiter((column_index[s] for s in row_symbols), dtype=np.intp, count=len(rows))
+
+        values = np.full((len(timestamps), len(columns)), np.nan)
+        values[time_index, symbol_index] = np.asarray(row_values, dtype=np.float64)
+        return timestamps, columns, values
+
+    def get_latest_timestamp(self, symbol: Optional[str] = None) -> Optional[float]:
+        """Timestamp of the newest stored snapshot, optionally for one symbol"""
+        query = "SELECT MAX(timestamp) FROM market_snapshots"
+        params: Tuple[Any, ...] = ()
+        if symbol:
+            query += " WHERE symbol = ?"
+            params = (symbol.upper(),)
+        try:
+            with self._lock:
+                row = self._connect().execute(query, params).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.log_error("Market Data Store", str(e))
+            return None
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                logger.logger.info("Market data store closed")
+
+# Create singleton instance
+market_store: MarketDataStore = LazySingleton(MarketDataStore)  # type: ignore[assignment]
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import gzip
+import json
+import math
+import random
+import re
+import threading
+import time
+
+@dataclass
+class StubBehavior:
+    """Latency and failure injection shared by all stub servers"""
+    latency: float = 0.05
+    jitter: float = 0.02
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    seed: Optional[int] = None
+    # Sent as Retry-After (seconds) on injected failures when set
+    retry_after: Optional[float] = None
+    # Tail latency: this fraction of requests takes slow_latency extra seconds
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> None:
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+            if self._random.random() < self.slow_rate:
+                extra += self.slow_latency
+        time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+class _StubServer:
+    """ThreadingHTTPServer on an ephemeral localhost port, run from a daemon thread"""
+
+    def __init__(self, handler: type, behavior: StubBehavior) -> None:
+        self.behavior = behavior
+        self.requests: int = 0
+        self.failures: int = 0
+        # Response body bytes as sent on the wire, after any compression
+        self.bytes_sent: int = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._server.stub = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> '_StubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def stub(self) -> Any:
+        return self.server.stub  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        headers = dict(headers or {})
+        if len(body) > 1024 and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        self.stub.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def _inject(self) -> bool:
+        """Apply latency and maybe fail the request; True if a failure was sent"""
+        self.stub.requests += 1
+        self.stub.behavior.delay()
+        if self.stub.behavior.should_fail():
+            self.stub.failures += 1
+            behavior = self.stub.behavior
+            headers = {'Retry-After': f"{behavior.retry_after:g}"} if behavior.retry_after is not None else None
+            self._send_json(behavior.failure_status, {'error': 'injected failure'}, headers)
+            return True
+        return False
+
+class CoinGeckoStub(_StubServer):
+    """Mimics /coins/markets and /simple/price with random-walk prices"""
+
+    def __init__(self, behavior: StubBehavior, asset_count: int = 100) -> None:
+        super().__init__(_CoinGeckoHandler, behavior)
+        self._random = random.Random(behavior.seed)
+        self._lock = threading.Lock()
+        self.coins: List[Dict[str, Any]] = [
+            self._coin('bitcoin', 'btc', 'Bitcoin', 65000.0, 1.3e12),
+            self._coin('ethereum', 'eth', 'Ethereum', 3200.0, 3.9e11)
+        ]
+        for rank in range(3, asset_count + 1):
+            price = 10 ** self._random.uniform(-2, 3)
+            self.coins.append(self._coin(f'asset-{rank}', f'a{rank}', f'Asset {rank}', price, 2e11 / rank))
+
+    @staticmethod
+    def _coin(coin_id: str, symbol: str, name: str, price: float, market_cap: float) -> Dict[str, Any]:
+        return {
+            'id': coin_id,
+            'symbol': symbol,
+            'name': name,
+            'current_price': price,
+            'market_cap': market_cap,
+            'total_volume': market_cap * 0.03,
+            'price_change_percentage_24h': 0.0,
+            'price_change_percentage_1h_in_currency': 0.0,
+            'price_change_percentage_24h_in_currency': 0.0,
+            'price_change_percentage_7d_in_currency': 0.0,
+            # Fields the bot never reads, so /coins/markets rows are as heavy as the real ones
+            'image': f'https://coin-images.coingecko.com/coins/images/1/large/{coin_id}.png',
+            'market_cap_rank': None,
+            'fully_diluted_valuation': market_cap * 1.1,
+            'high_24h': price * 1.02,
+            'low_24h': price * 0.98,
+            'price_change_24h': 0.0,
+            'market_cap_change_24h': 0.0,
+            'market_cap_change_percentage_24h': 0.0,
+            'circulating_supply': market_cap / price,
+            'total_supply': market_cap / price,
+            'max_supply': None,
+            'ath': price * 1.5,
+            'ath_change_percentage': -33.3,
+            'ath_date': '2024-03-14T07:10:36.635Z',
+            'atl': price * 0.01,
+            'atl_change_percentage': 9900.0,
+            'atl_date': '2015-10-20T00:00:00.000Z',
+            'roi': None,
+            'last_updated': '2024-06-01T12:00:00.000Z'
+        }
+
+    def tick(self) -> List[Dict[str, Any]]:
+        """Advance every price one step (BTC-correlated) and return a snapshot"""
+        with self._lock:
+            market = self._random.gauss(0, 0.004)
+            for coin in self.coins:
+                move = 0.7 * market + self._random.gauss(0, 0.004)
+                coin['current_price'] *= math.exp(move)
+                coin['market_cap'] *= math.exp(move)
+                coin['price_change_percentage_24h'] = max(-30.0, min(30.0, coin['price_change_percentage_24h'] + move * 100))
+                coin['price_change_percentage_24h_in_currency'] = coin['price_change_percentage_24h']
+                coin['price_change_percentage_1h_in_currency'] = move * 100
+            return [dict(coin) for coin in self.coins]
+
+class _CoinGeckoHandler(_StubHandler):
+    def do_GET(self) -> None:
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path.endswith('/coins/markets'):
+            per_page = int(query.get('per_page', 100))
+            page = int(query.get('page', 1))
+            coins = self.stub.tick()
+            self._send_json(200, coins[(page - 1) * per_page:page * per_page])
+        elif url.path.endswith('/simple/price'):
+            ids = set(query.get('ids', '').split(','))
+            coins = self.stub.tick()
+            extras = [
+                (key, field) for flag, key, field in (
+                    ('include_24hr_change', 'usd_24h_change', 'price_change_percentage_24h'),
+                    ('include_24hr_vol', 'usd_24h_vol', 'total_volume'),
+                    ('include_market_cap', 'usd_market_cap', 'market_cap')
+                ) if query.get(flag) == 'true'
+            ]
+            self._send_json(200, {
+                coin['id']: {'usd': coin['current_price'], **{key: coin[field] for key, field in extras}}
+                for coin in coins if coin['id'] in ids
+            })
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+class CoinCapStub(_StubServer):
+    """Mimics CoinCap /assets over the same market as a CoinGeckoStub, numbers sent as strings"""
+
+    def __init__(self, behavior: StubBehavior, market: CoinGeckoStub) -> None:
+        super().__init__(_CoinCapHandler, behavior)
+        self.market = market
+
+    def assets(self, limit: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                'id': coin['id'],
+                'rank': str(rank),
+                'symbol': coin['symbol'].upper(),
+                'name': coin['name'],
+                'supply': str(coin['circulating_supply']),
+                'maxSupply': None,
+                'marketCapUsd': str(coin['market_cap']),
+                'volumeUsd24Hr': str(coin['total_volume']),
+                'priceUsd': str(coin['current_price']),
+                'changePercent24Hr': str(coin['price_change_percentage_24h']),
+                'vwap24Hr': str(coin['current_price'])
+            }
+            for rank, coin in enumerate(self.market.tick()[:limit], start=1)
+        ]
+
+class _CoinCapHandler(_StubHandler):
+    def do_GET(self) -> None:
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path.endswith('/assets'):
+            self._send_json(200, {'data': self.stub.assets(int(query.get('limit', 100))), 'timestamp': int(time.time() * 1000)})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+class AnthropicStub(_StubServer):
+    """Fake Messages API: JSON or SSE streaming responses with per-token delay, plus Message Batches"""
+
+    def __init__(self,
+                 behavior: StubBehavior,
+                 token_delay: float = 0.01,
+                 tokens: int = 60,
+                 batch_latency: float = 1.0) -> None:
+        super().__init__(_AnthropicHandler, behavior)
+        self.token_delay: float = token_delay
+        self.tokens: int = tokens
+        self.streamed_tokens: int = 0
+        # Seconds a submitted batch stays in_progress before it ends
+        self.batch_latency: float = batch_latency
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prompt_of(params: Dict[str, Any]) -> str:
+        return ''.join(
+            m['content'] if isinstance(m['content'], str) else ''.join(b.get('text', '') for b in m['content'])
+            for m in params.get('messages', [])
+        )
+
+    def message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Non-streaming Messages API response for request params"""
+        prompt = self.prompt_of(params)
+        text = self.answer(prompt)
+        return {
+            'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': params.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn', 'stop_sequence': None,
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+        }
+
+    def create_batch(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Answer every request up front; the batch reports them once batch_latency has passed"""
+        with self._lock:
+            batch_id = f"msgbatch_stub_{len(self.batches) + 1}"
+            self.batches[batch_id] = {
+                'created': time.time(),
+                'results': [
+                    {'custom_id': item['custom_id'], 'result': {'type': 'succeeded', 'message': self.message(item['params'])}}
+                    for item in requests
+                ]
+            }
+        return self.batch(batch_id)
+
+    def batch(self, batch_id: str) -> Dict[str, Any]:
+        """MessageBatch object as returned by create and retrieve"""
+        entry = self.batches[batch_id]
+        ended = time.time() >= entry['created'] + self.batch_latency
+        count = len(entry['results'])
+
+        def stamp(ts: float) -> str:
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else count, 'succeeded': count if ended else 0,
+                'errored': 0, 'canceled': 0, 'expired': 0
+            },
+            'created_at': stamp(entry['created']),
+            'expires_at': stamp(entry['created'] + 24 * 3600),
+            'ended_at': stamp(entry['created'] + self.batch_latency) if ended else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{self.base_url}/v1/messages/batches/{batch_id}/results" if ended else None
+        }
+
+    def answer(self, prompt: str) -> str:
+        """Analysis text, or a JSON object when the batched-pairs prompt asks for one"""
+        if 'JSON object' in prompt:
+            pair_ids = re.findall(r'^\[(.+?)\]$', prompt, re.MULTILINE)
+            return json.dumps({pair_id: f"{pair_id} moves with the market; momentum neutral." for pair_id in pair_ids})
+        words = ("ETH and BTC remain tightly coupled while volume rotates between majors and "
+                 "sentiment stays cautious ahead of the next macro print. ").split()
+        return ' '.join(words[i % len(words)] for i in range(self.tokens))
+
+class _AnthropicHandler(_StubHandler):
+    BATCH_PATH = re.compile(r'/v1/messages/batches/([^/]+)(/results)?$')
+
+    def _not_found(self) -> None:
+        self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+
+    def do_GET(self) -> None:
+        if self._inject():
+            return
+        match = self.BATCH_PATH.search(urlparse(self.path).path)
+        if not match or match.group(1) not in self.stub.batches:
+            self._not_found()
+            return
+
+        batch_id, results = match.groups()
+        if not results:
+            self._send_json(200, self.stub.batch(batch_id))
+        elif self.stub.batch(batch_id)['processing_status'] != 'ended':
+            self._not_found()
+        else:
+            lines = ''.join(json.dumps(item) + '\n' for item in self.stub.batches[batch_id]['results'])
+            self._send(200, lines.encode('utf-8'), 'application/binary')
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if self._inject():
+            return
+        path = urlparse(self.path).path
+        if path.endswith('/v1/messages/batches'):
+            self._send_json(200, self.stub.create_batch(request.get('requests', [])))
+            return
+        if not path.endswith('/v1/messages'):
+            self._not_found()
+            return
+
+        prompt = self.stub.prompt_of(request)
+        text = self.stub.answer(prompt)
+        model = request.get('model', 'stub')
+        usage = {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+
+        if not request.get('stream'):
+            time.sleep(self.stub.token_delay * usage['output_tokens'])
+            self._send_json(200, self.stub.message(request))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(name: str, payload: Dict[str, Any]) -> None:
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            event('message_start', {'type': 'message_start', 'message': {
+                'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+                'stop_reason': None, 'stop_sequence': None,
+                'usage': {'input_tokens': usage['input_tokens'], 'output_tokens': 1}
+            }})
+            event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                          'content_block': {'type': 'text', 'text': ''}})
+            for token in re.findall(r'\S+\s*', text):
+                time.sleep(self.stub.token_delay)
+                event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                              'delta': {'type': 'text_delta', 'text': token}})
+                self.stub.streamed_tokens += 1
+            event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            event('message_delta', {'type': 'message_delta',
+                                    'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                    'usage': {'output_tokens': usage['output_tokens']}})
+            event('message_stop', {'type': 'message_stop'})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading early (stream cut off at the tweet budget)
+            pass
+
+# Static pages using the same data-testids and texts the bot's locators expect
+TWITTER_PAGES: Dict[str, str] = {
+    '/login': """<!DOCTYPE html><html><head><title>Log in</title></head><body>
+<div id="step-username">
+  <input autocomplete="username" name="text">
+  <div role="button" onclick="nextStep()"><span>Next</span></div>
+</div>
+<div id="step-password" style="display:none">
+  <input type="password" name="password">
+  <div role="button" data-testid="LoginForm_Login_Button" onclick="logIn()"><span>Log in</span></div>
+</div>
+<script>
+function nextStep() {
+  document.getElementById('step-username').style.display = 'none';
+  document.getElementById('step-password').style.display = 'block';
+}
+function logIn() {
+  document.cookie = 'auth_token=stub; path=/; max-age=86400';
+  setTimeout(() => { window.location.href = '/home'; }, 50);
+}
+</script></body></html>""",
+    '/home': """<!DOCTYPE html><html><head><title>Home</title>
+<script>if (!document.cookie.includes('auth_token=')) window.location.replace('/login');</script>
+</head><body>
+<nav><a data-testid="AppTabBar_Profile_Link" href="/home">Profile</a>
+<a data-testid="SideNav_NewTweet_Button" href="/compose/tweet">Post</a></nav>
+<main data-testid="primaryColumn">Timeline</main>
+</body></html>""",
+    '/compose/tweet': """<!DOCTYPE html><html><head><title>Compose</title>
+<script>if (!document.cookie.includes('auth_token=')) window.location.replace('/login');</script>
+</head><body>
+<div id="composer">
+  <div data-testid="tweetTextarea_0" role="textbox" contenteditable="true" style="min-height:40px"></div>
+  <div data-testid="tweetButton" role="button" aria-disabled="true"><span>Post</span></div>
+</div>
+<script>
+const area = document.querySelector('[data-testid="tweetTextarea_0"]');
+const button = document.querySelector('[data-testid="tweetButton"]');
+area.addEventListener('input', () => {
+  button.setAttribute('aria-disabled', area.textContent.trim() ? 'false' : 'true');
+});
+button.addEventListener('click', () => {
+  if (button.getAttribute('aria-disabled') === 'true') return;
+  fetch('/api/tweets', {method: 'POST', body: area.textContent}).then(() => {
+    document.getElementById('composer').remove();
+    const toast = document.createElement('div');
+    toast.setAttribute('data-testid', 'toast');
+    toast.textContent = 'Your post was sent.';
+    document.body.appendChild(toast);
+  });
+});
+</script></body></html>""",
+    '/robots.txt': "User-agent: *\nDisallow:\n"
+}
+
+class TwitterStub(_StubServer):
+    """Serves the login, home and compose pages and records posted tweets"""
+
+    def __init__(self, behavior: StubBehavior) -> None:
+        super().__init__(_TwitterHandler, behavior)
+        self.tweets: List[Tuple[float, str]] = []
+
+class _TwitterHandler(_StubHandler):
+    def do_GET(self) -> None:
+        if self._inject():
+            return
+        path = urlparse(self.path).path
+        page = TWITTER_PAGES.get(path)
+        if page is None:
+            self._send(404, b'not found', 'text/plain')
+            return
+        content_type = 'text/plain' if path.endswith('.txt') else 'text/html; charset=utf-8'
+        self._send(200, page.encode('utf-8'), content_type)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        text = self.rfile.read(length).decode('utf-8')
+        if urlparse(self.path).path != '/api/tweets':
+            self._send(404, b'not found', 'text/plain')
+            return
+        self.stub.tweets.append((time.time(), text))
+        self._send_json(200, {'ok': True})
+
+@dataclass
+class StubEnvironment:
+    """All the stand-ins, started together"""
+    coingecko: CoinGeckoStub
+    coincap: CoinCapStub
+    anthropic: AnthropicStub
+    twitter: TwitterStub
+    servers: List[_StubServer] = field(default_factory=list)
+
+    @classmethod
+    def start(cls,
+              coingecko: StubBehavior,
+              anthropic: StubBehavior,
+              twitter: StubBehavior,
+              coincap: Optional[StubBehavior] = None,
+              asset_count: int = 100,
+              token_delay: float = 0.01,
+              batch_latency: float = 1.0) -> 'StubEnvironment':
+        market = CoinGeckoStub(coingecko, asset_count)
+        env = cls(
+            market,
+            CoinCapStub(coincap or StubBehavior(seed=coingecko.seed), market),
+            AnthropicStub(anthropic, token_delay, batch_latency=batch_latency),
+            TwitterStub(twitter)
+        )
+        env.servers = [env.coingecko.start(), env.coincap.start(), env.anthropic.start(), env.twitter.start()]
+        return env
+
+    def stop(self) -> None:
+        for server in self.servers:
+            server.stop()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Optional, Any
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.logger import logger
+from utils.lazy import LazySingleton
+from config import config
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+class Span:
+    """One timed operation; parent/child links follow the with-block nesting"""
+
+    __slots__ = ('tracer', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start', '_start_counter', 'duration_ms', 'status', 'error', 'thread', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name: str = name
+        self.attributes: Dict[str, Any] = attributes
+        self.span_id: str = os.urandom(8).hex()
+        self.status: str = 'ok'
+        self.error: Optional[str] = None
+        self.duration_ms: float = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> 'Span':
+        parent = _current_span.get()
+        self.trace_id: str = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_id: Optional[str] = parent.span_id if parent else None
+        self._token = _current_span.set(self)
+        self.thread: str = threading.current_thread().name
+        self.start: float = time.time()
+        self._start_counter: float = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self._start_counter) * 1000
+        if exc_type is not None:
+            self.status = 'error'
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms, 3),
+            'status': self.status,
+            'error': self.error,
+            'thread': self.thread,
+            'attributes': self.attributes
+        }
+
+class _NoopSpan:
+    """Returned when tracing is disabled so instrumented code pays almost nothing"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _SpanRecord:
+    """Defers JSON encoding of a span until the log record is formatted"""
+
+    __slots__ = ('span',)
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+
+    def __str__(self) -> str:
+        return json.dumps(self.span.to_dict(), default=str)
+
+class Tracer:
+    """Creates spans and writes finished ones as JSON lines to a rotating file"""
+
+    def __init__(self,
+                 enabled: bool,
+                 path: str,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5) -> None:
+        self.enabled: bool = enabled
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.backup_count: int = backup_count
+        self._writer: Optional[logging.Logger] = None
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """Context manager timing the enclosed block as a child of the current span"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    def _get_writer(self) -> logging.Logger:
+        with self._lock:
+            if self._writer is None:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    self.path,
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backup_count,
+                    encoding='utf-8'
+                )
+                # Spans go only to their own file, written from the logging thread
+                self._writer = logger.add_channel('ETHBTCCorrelation.traces', handler)
+            return self._writer
+
+    def export(self, span: Span) -> None:
+        # Serialized on the logging thread; the span is finished and no longer mutated
+        self._get_writer().info('%s', _SpanRecord(span))
+
+# Create singleton instance
+tracer: Tracer = LazySingleton(lambda: Tracer(  # type: ignore[assignment]
+    enabled=config.TRACING_ENABLED,
+    path=config.TRACE_FILE_PATH,
+    max_bytes=config.TRACE_FILE_MAX_BYTES
+))
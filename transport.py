@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Tuple, TYPE_CHECKING
+import importlib.util
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from config import HttpTransportConfig
+
+if TYPE_CHECKING:
+    import aiohttp
+
+def accept_encoding() -> str:
+    """gzip and deflate, plus br when a Brotli decoder is installed for urllib3 and aiohttp"""
+    encodings = ['gzip', 'deflate']
+    if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+        encodings.append('br')
+    return ', '.join(encodings)
+
+class TimeoutSession(requests.Session):
+    """requests.Session with a default (connect, read) timeout; a plain Session has none"""
+
+    def __init__(self, timeout: Tuple[float, float]) -> None:
+        super().__init__()
+        self.default_timeout: Tuple[float, float] = timeout
+
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        return super().request(method, url, *args, **kwargs)
+
+def build_session(settings: HttpTransportConfig) -> TimeoutSession:
+    """Pooled keep-alive session with compression and connection-level retries
+
+    Only failures before a request reaches the server are retried here; status codes
+    and read timeouts are left to the service guards so retries are not multiplied.
+    """
+    session = TimeoutSession((settings['connect_timeout'], settings['read_timeout']))
+    retry = Retry(
+        total=settings['connect_retries'],
+        connect=settings['connect_retries'],
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.25,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize'],
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json', 'Accept-Encoding': accept_encoding()})
+    return session
+
+def build_async_session(settings: HttpTransportConfig) -> 'aiohttp.ClientSession':
+    """aiohttp counterpart of build_session for the async pipeline"""
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=settings['pool_maxsize'],
+        limit_per_host=settings['pool_maxsize'],
+        keepalive_timeout=settings['keepalive_seconds'],
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None,
+        connect=settings['connect_timeout'],
+        sock_read=settings['read_timeout']
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={'Accept': 'application/json', 'Accept-Encoding': accept_encoding()}
+    )
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, Any, Callable, Tuple, TYPE_CHECKING
+from collections import deque
+import math
+import time
+from selenium.common.exceptions import WebDriverException
+
+from utils.logger import logger
+from utils.tracing import tracer
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webelement import WebElement
+    from utils.browser import BrowserSetup
+
+# Installed on every new document; counts in-flight fetch/XHR requests
+NETWORK_TRACKER_JS = """
+(function() {
+    if (window.__pendingRequests !== undefined) return;
+    window.__pendingRequests = 0;
+    window.__lastNetworkActivity = Date.now();
+    const done = () => {
+        window.__pendingRequests = Math.max(0, window.__pendingRequests - 1);
+        window.__lastNetworkActivity = Date.now();
+    };
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function() {
+            window.__pendingRequests++;
+            window.__lastNetworkActivity = Date.now();
+            return originalFetch.apply(this, arguments).finally(done);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__pendingRequests++;
+        window.__lastNetworkActivity = Date.now();
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+class AdaptiveTimeout:
+    """Timeout budget learned from recent wait latencies"""
+
+    MIN_OBSERVATIONS: int = 5
+
+    def __init__(self,
+                 initial: float,
+                 minimum: float,
+                 maximum: float,
+                 factor: float = 3.0,
+                 history: int = 20) -> None:
+        self.initial: float = initial
+        self.minimum: float = minimum
+        self.maximum: float = maximum
+        self.factor: float = factor
+        self._samples: deque = deque(maxlen=history)
+
+    def current(self) -> float:
+        """factor x p95 of recent latencies, clamped to [minimum, maximum]"""
+        if len(self._samples) < self.MIN_OBSERVATIONS:
+            # Until then, never less than a timed-out wait took
+            return min(self.maximum, max(self.initial, *self._samples)) if self._samples else self.initial
+        ordered = sorted(self._samples)
+        p95 = ordered[math.ceil(0.95 * len(ordered)) - 1]
+        return min(self.maximum, max(self.minimum, p95 * self.factor))
+
+    def observe(self, elapsed: float, success: bool) -> None:
+        if success:
+            self._samples.append(elapsed)
+            return
+        # A timeout means the budget was too small; a single slow sample would sit above the
+        # p95, so restart from the initial budget with it as the slowest sample seen
+        self._samples.clear()
+        self._samples.append(elapsed * 2)
+
+class WaitEngine:
+    """Condition-based waits that replace fixed sleeps in the browser paths"""
+
+    POLL_INTERVAL: float = 0.1
+
+    def __init__(self, browser: 'BrowserSetup') -> None:
+        self.browser = browser
+        self.timeouts: Dict[str, AdaptiveTimeout] = {}
+        self.totals: Dict[str, Tuple[int, float]] = {}
+
+    def _timeout(self, name: str, initial: float, minimum: Optional[float], maximum: float) -> AdaptiveTimeout:
+        # Fast runs can shrink a budget to half the caller's initial one, not below
+        if minimum is None:
+            minimum = initial / 2
+        if name not in self.timeouts:
+            self.timeouts[name] = AdaptiveTimeout(initial, minimum, maximum)
+        return self.timeouts[name]
+
+    def _record(self, name: str, elapsed: float, budget: float, success: bool) -> None:
+        self.timeouts[name].observe(elapsed, success)
+        count, total = self.totals.get(name, (0, 0.0))
+        self.totals[name] = (count + 1, total + elapsed)
+        if success:
+            logger.logger.debug(f"Wait '{name}' satisfied in {elapsed:.2f}s (budget {budget:.1f}s)")
+        else:
+            logger.logger.warning(f"Wait '{name}' timed out after {elapsed:.2f}s")
+
+    def until(self,
+              name: str,
+              condition: Callable[[], Any],
+              initial: float = 10,
+              minimum: Optional[float] = None,
+              maximum: float = 30) -> Any:
+        """Poll condition until truthy or the adaptive budget runs out; returns its value or None"""
+        adaptive = self._timeout(name, initial, minimum, maximum)
+        budget = adaptive.current()
+        with tracer.span('browser.wait', name=name, budget=budget) as span:
+            start = time.monotonic()
+            while True:
+                try:
+                    value = condition()
+                except WebDriverException:
+                    value = None
+                if value:
+                    self._record(name, time.monotonic() - start, budget, True)
+                    span.set_attribute('satisfied', True)
+                    return value
+                if time.monotonic() - start >= budget:
+                    self._record(name, time.monotonic() - start, budget, False)
+                    span.set_attribute('satisfied', False)
+                    return None
+                time.sleep(self.POLL_INTERVAL)
+
+    def _script(self, js: str) -> Callable[[], Any]:
+        return lambda: self.browser.driver.execute_script(js)
+
+    def interactable(self,
+                     name: str,
+                     locators: List[Tuple[str, str]],
+                     initial: float = 10,
+                     maximum: float = 30) -> Optional['WebElement']:
+        """First clickable element among locators"""
+        adaptive = self._timeout(name, initial, None, maximum)
+        budget = adaptive.current()
+        start = time.monotonic()
+        # wait_for_any records its own span with the selectors and winner
+        result = self.browser.wait_for_any(locators, timeout=budget, condition='clickable', key=name)
+        self._record(name, time.monotonic() - start, budget, result is not None)
+        return result[1] if result else None
+
+    def network_idle(self,
+                     name: str = 'network_idle',
+                     quiet: float = 0.5,
+                     initial: float = 10,
+                     maximum: float = 30) -> bool:
+        """Document loaded and no tracked fetch/XHR in flight for `quiet` seconds (true if the tracker is absent)"""
+        js = f"""
+        if (document.readyState !== 'complete') return false;
+        if (window.__pendingRequests === undefined) return true;
+        return window.__pendingRequests === 0 &&
+            Date.now() - window.__lastNetworkActivity >= {int(quiet * 1000)};
+        """
+        return bool(self.until(name, self._script(js), initial, maximum=maximum))
+
+    def url_leaves(self, fragments: List[str], name: str = 'url_change', initial: float = 60) -> bool:
+        """Current URL no longer contains any of the fragments"""
+        # Keep a high floor: a human may need to type a 2FA code here
+        return bool(self.until(
+            name,
+            lambda: not any(f in self.browser.driver.current_url for f in fragments),
+            initial,
+            minimum=initial,
+            maximum=120
+        ))
+
+    def summary(self) -> Dict[str, float]:
+        """Mean observed duration per wait, for comparing against the sleeps they replaced"""
+        return {name: total / count for name, (count, total) in self.totals.items() if count}
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+from dataclasses import dataclass
+import psutil
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from utils.browser import BrowserSetup
+
+@dataclass
+class ResourceSample:
+    rss_mb: float
+    cpu_percent: float
+    processes: int
+    page_loads: int
+
+class BrowserWatchdog:
+    """Samples the chromedriver/Chrome process tree and decides when to recycle the driver"""
+
+    def __init__(self,
+                 browser: 'BrowserSetup',
+                 max_rss_mb: float,
+                 max_cpu_percent: float,
+                 max_page_loads: int,
+                 cpu_breaches: int = 3) -> None:
+        self.browser = browser
+        self.max_rss_mb: float = max_rss_mb
+        self.max_cpu_percent: float = max_cpu_percent
+        self.max_page_loads: int = max_page_loads
+        # CPU must stay above the limit for this many consecutive samples
+        self.cpu_breaches: int = cpu_breaches
+        self._consecutive_cpu_breaches = 0
+        # psutil needs the same Process objects across calls to report cpu_percent
+        self._processes: Dict[int, psutil.Process] = {}
+        self.last_sample: Optional[ResourceSample] = None
+
+    def _process_tree(self) -> List[psutil.Process]:
+        driver = self.browser.driver
+        service_process = getattr(getattr(driver, 'service', None), 'process', None) if driver else None
+        if service_process is None:
+            return []
+        try:
+            root = psutil.Process(service_process.pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+
+        current: Dict[int, psutil.Process] = {}
+        for process in tree:
+            current[process.pid] = self._processes.get(process.pid, process)
+        self._processes = current
+        return list(current.values())
+
+    def sample(self) -> Optional[ResourceSample]:
+        """Total RSS and CPU of the driver's process tree"""
+        processes = self._process_tree()
+        if not processes:
+            return None
+
+        rss = 0
+        cpu = 0.0
+        for process in processes:
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(interval=None)
+            except psutil.Error:
+                continue
+
+        self.last_sample = ResourceSample(
+            rss_mb=rss / (1024 * 1024),
+            cpu_percent=cpu,
+            processes=len(processes),
+            page_loads=self.browser.page_loads
+        )
+        metrics.browser_rss.set(rss, browser=self.browser.name)
+        metrics.browser_cpu.set(cpu, browser=self.browser.name)
+        metrics.browser_page_loads.set(self.browser.page_loads, browser=self.browser.name)
+        return self.last_sample
+
+    def check(self) -> Optional[str]:
+        """Return the reason the driver should be recycled, or None if it is healthy"""
+        sample = self.sample()
+        if sample is None:
+            return None
+
+        logger.logger.info(
+            f"Browser resources - RSS: {sample.rss_mb:.0f}MB - CPU: {sample.cpu_percent:.0f}% - "
+            f"Processes: {sample.processes} - Page loads: {sample.page_loads}"
+        )
+
+        if sample.cpu_percent > self.max_cpu_percent:
+            self._consecutive_cpu_breaches += 1
+        else:
+            self._consecutive_cpu_breaches = 0
+
+        if sample.rss_mb > self.max_rss_mb:
+            return f"RSS {sample.rss_mb:.0f}MB exceeds {self.max_rss_mb:.0f}MB"
+        if sample.page_loads >= self.max_page_loads:
+            return f"{sample.page_loads} page loads reached limit of {self.max_page_loads}"
+        if self._consecutive_cpu_breaches >= self.cpu_breaches:
+            return f"CPU above {self.max_cpu_percent:.0f}% for {self._consecutive_cpu_breaches} samples"
+        return None
+
+    def reset(self) -> None:
+        """Forget per-process state after the driver has been replaced"""
+        self._processes = {}
+        self._consecutive_cpu_breaches = 0
+
+    def watch(self, browser: 'BrowserSetup') -> None:
+        """Switch to another browser, e.g. after a failover"""
+        self.browser = browser
+        self.reset()